@@ -1,10 +1,13 @@
-from flask import Flask, render_template, request, redirect, url_for, jsonify
+from flask import Flask, render_template, request, redirect, url_for, jsonify, make_response, g, abort
 from dotenv import load_dotenv
+from werkzeug.http import is_resource_modified
 import os
-from news_aggregator import NewsFeed
-from datetime import datetime
-import html
-from bs4 import BeautifulSoup
+import time
+import hashlib
+from news_aggregator import NewsFeed, BackgroundRefresher
+from page_cache import PageCache
+from metrics import REGISTRY, SamplingProfiler
+from datetime import datetime, timezone
 import logging
 
 # Set up logging
@@ -16,11 +19,129 @@ load_dotenv()
 
 app = Flask(__name__)
 
+# A single feed per process so that refreshes are shared between requests
+news_feed = NewsFeed(
+    extraction_workers=int(os.environ['NEWS_EXTRACTION_WORKERS']) if os.getenv('NEWS_EXTRACTION_WORKERS') else None,
+    nlp_mode=os.getenv('NEWS_NLP_MODE', 'inline'),
+    storage_path=os.getenv('NEWS_DB_PATH', 'articles.db'),
+    retention=float(os.getenv('NEWS_RETENTION', 7 * 86400)),
+    poll_interval=float(os.getenv('NEWS_REFRESH_INTERVAL', 3600)),
+    min_poll_interval=float(os.getenv('NEWS_MIN_POLL_INTERVAL', 300)),
+    max_poll_interval=float(os.getenv('NEWS_MAX_POLL_INTERVAL', 6 * 3600))
+)
+refresher = BackgroundRefresher(news_feed)
+BACKGROUND_REFRESH = os.getenv('NEWS_BACKGROUND_REFRESH', '1') != '0'
+PAGE_SIZE = int(os.getenv('NEWS_PAGE_SIZE', '20'))  # Articles per page on the home page and /api/articles
+CACHE_MAX_AGE = int(os.getenv('NEWS_CACHE_MAX_AGE', '60'))  # Seconds browsers and proxies may reuse a page
+page_cache = PageCache(max_entries=int(os.getenv('NEWS_PAGE_CACHE_SIZE', '128')))
+# Sampling profiler behind /debug/profile, only available with NEWS_PROFILER=1
+profiler = SamplingProfiler() if os.getenv('NEWS_PROFILER') == '1' else None
+
+REQUEST_SECONDS = REGISTRY.histogram('news_http_request_seconds', 'Seconds to handle a request',
+                                     ['endpoint', 'method', 'status'])
+PAGE_CACHE = REGISTRY.counter('news_page_cache_total', 'Rendered page cache lookups', ['result'])
+NOT_MODIFIED = REGISTRY.counter('news_http_not_modified_total', 'Conditional requests answered with 304',
+                                ['endpoint'])
+STALE_RESPONSES = REGISTRY.counter('news_stale_responses_total', 'Responses built from an expired snapshot',
+                                   ['endpoint'])
+
+def snapshot_gauge(fn):
+    """Gauge callback reading the snapshot being served, without triggering a refresh."""
+    def read():
+        snapshot = news_feed.store.get_snapshot()
+        return fn(snapshot) if snapshot is not None else 0
+    return read
+
+def source_gauge(fn):
+    """Gauge callback with one value per source, computed from its source_status() entry."""
+    return lambda: {(status['name'],): fn(status) for status in news_feed.source_status()}
+
+REGISTRY.gauge('news_corpus_articles', 'Articles being served', snapshot_gauge(lambda s: len(s.articles)))
+REGISTRY.gauge('news_corpus_generation', 'Generation of the corpus being served', snapshot_gauge(lambda s: s.generation))
+REGISTRY.gauge('news_corpus_age_seconds', 'Seconds since the corpus was last written', lambda: news_feed.cache_age())
+REGISTRY.gauge('news_refreshing', 'Whether a refresh is running', lambda: news_feed.is_refreshing())
+REGISTRY.gauge('news_refresh_leader', 'Whether this process crawls for the shared database',
+               lambda: news_feed.leader.is_leader())
+REGISTRY.gauge('news_page_cache_entries', 'Rendered pages cached', lambda: len(page_cache))
+REGISTRY.gauge('news_extraction_cache_entries', 'Extracted articles cached', lambda: len(news_feed.extraction_cache))
+REGISTRY.gauge('news_source_up', 'Whether the circuit breaker of a source is closed',
+               source_gauge(lambda status: status['state'] == 'closed'), ['source'])
+REGISTRY.gauge('news_source_latency_seconds', 'Smoothed fetch latency of a source',
+               source_gauge(lambda status: status['latency_ms'] / 1000 if status['latency_ms'] is not None else None),
+               ['source'])
+REGISTRY.gauge('news_source_error_rate', 'Smoothed share of failed fetches of a source',
+               source_gauge(lambda status: status['error_rate']), ['source'])
+REGISTRY.gauge('news_source_poll_interval_seconds', 'Current poll interval of a source',
+               source_gauge(lambda status: status['poll_interval']), ['source'])
+
+@app.before_request
+def start_background_refresh():
+    """Start the refresh timer once this process begins serving requests."""
+    if BACKGROUND_REFRESH and not refresher.is_running():
+        refresher.start()
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def mark_stale(response):
+    """Flag responses built from an expired snapshot that is being refreshed."""
+    if request.endpoint in ('home', 'article', 'api_article', 'api_articles') and news_feed.is_stale():
+        response.headers['Warning'] = '110 - "Response is Stale"'
+        STALE_RESPONSES.inc(endpoint=request.endpoint)
+    return response
+
+@app.after_request
+def record_request_time(response):
+    if 'request_started' in g:
+        REQUEST_SECONDS.observe(time.perf_counter() - g.request_started, endpoint=request.endpoint or 'unknown',
+                                method=request.method, status=response.status_code)
+    return response
+
+def make_etag(version, *key):
+    """ETag for a response built from a corpus or article version (see NewsFeed.corpus_version)."""
+    return hashlib.sha1(repr((version,) + key).encode('utf-8')).hexdigest()[:20]
+
+def not_modified(etag, timestamp):
+    """Whether the client's conditional request shows it already has this response."""
+    last_modified = datetime.fromtimestamp(int(timestamp), timezone.utc)
+    return not is_resource_modified(request.environ, etag=etag, last_modified=last_modified)
+
+def with_validators(response, etag, timestamp):
+    """Add ETag, Last-Modified and Cache-Control headers to a response; a body-less response becomes a 304."""
+    if response is None:
+        NOT_MODIFIED.inc(endpoint=request.endpoint)
+        response = app.response_class(status=304)
+    response.set_etag(etag)
+    response.last_modified = datetime.fromtimestamp(int(timestamp), timezone.utc)
+    response.cache_control.public = True
+    response.cache_control.max_age = CACHE_MAX_AGE
+    return response
+
+def article_card(article):
+    """Lightweight projection of an article for listings, without its full text."""
+    images = article.get('images') or []
+    return {
+        'id': article.get('id'),
+        'title': article.get('title'),
+        'source': article.get('source'),
+        'category': article.get('category'),
+        'published': article.get('published'),
+        'published_ts': article.get('published_ts'),
+        'authors': article.get('authors', []),
+        'url': article.get('url'),
+        'image': article.get('image') or (images[0] if images else ''),
+        'summary': article.get('summary', ''),
+        'paragraphs': article.preview  # The first paragraphs; the body stays in the database
+    }
+
 @app.route('/')
 def home():
     """Render the home page with news articles."""
     # Get category filter from query params
     category = request.args.get('category', '')
+    cursor = request.args.get('cursor', '')
     
     # Get force_refresh parameter
     force_refresh = request.args.get('refresh', '').lower() == 'true'
@@ -29,76 +150,61 @@ def home():
     current_date = datetime.now().strftime('%A, %B %d, %Y')
     current_year = datetime.now().year
     
-    articles = []
-    error_message = None
-    
     try:
-        # Get news articles
-        news_feed = NewsFeed()
-        
-        # Clear cache if refresh requested
-        if force_refresh and os.path.exists(news_feed.cache_file):
-            try:
-                os.remove(news_feed.cache_file)
-            except Exception as e:
-                logger.error(f"Error removing cache file: {e}")
+        # Start a refresh in the background if requested; the current snapshot is served meanwhile
+        if force_refresh:
+            news_feed.refresh(wait=False)
         
-        # Get articles with category filter
-        try:
-            articles = news_feed.get_articles(category=category if category else None)
-        except Exception as e:
-            logger.error(f"Error getting articles: {e}")
-            # Delete corrupt cache file if it exists
-            if os.path.exists(news_feed.cache_file):
-                try:
-                    os.remove(news_feed.cache_file)
-                    # Try again without the cache
-                    articles = news_feed.get_articles(category=category if category else None)
-                except Exception as new_e:
-                    logger.error(f"Error retrying after cache deletion: {new_e}")
+        stale = news_feed.is_stale()
+        version = news_feed.corpus_version()
+        if version is None:
+            return render_home(category, cursor, current_date, current_year, stale)
         
-        # Handle empty category
-        if not articles and category:
-            # Try clearing the cache and fetch again
-            if os.path.exists(news_feed.cache_file):
-                try:
-                    os.remove(news_feed.cache_file)
-                    articles = news_feed.get_articles(category=category)
-                except Exception as e:
-                    logger.error(f"Error fetching category after cache removal: {e}")
-                    # Fallback to general articles if category is empty
-                    try:
-                        articles = news_feed.get_articles()
-                    except Exception as fallback_e:
-                        logger.error(f"Error fetching fallback articles: {fallback_e}")
-        
-        # Add index to each article for routing to full view
-        for i, article in enumerate(articles):
-            article['id'] = i
-            
-            # Process article text for better readability
-            if article.get('text'):
-                # Split into paragraphs and keep only non-empty ones
-                paragraphs = [p.strip() for p in article['text'].split('\n') if p.strip()]
-                article['paragraphs'] = paragraphs[:5]  # Limit to first 5 paragraphs for preview
-            else:
-                article['paragraphs'] = []
+        # Everything the page depends on besides the corpus, for the ETag and the page cache
+        key = ('home', category, cursor, current_date, stale)
+        etag = make_etag(version, *key)
+        if not_modified(etag, version[1]):
+            return with_validators(None, etag, version[1])
+        page = page_cache.get(version, key)
+        PAGE_CACHE.inc(result='miss' if page is None else 'hit')
+        if page is None:
+            page = render_home(category, cursor, current_date, current_year, stale)
+            page_cache.put(version, key, page)
+        return with_validators(make_response(page), etag, version[1])
     
     except Exception as e:
         logger.error(f"Unhandled error in home route: {e}")
         error_message = f"An error occurred while loading the news. Please try refreshing the page."
+        return render_template('index.html',
+                              articles=[],
+                              current_date=current_date,
+                              current_year=current_year,
+                              current_category=category,
+                              error_message=error_message,
+                              next_cursor=None,
+                              stale=False)
+
+def render_home(category, cursor, current_date, current_year, stale):
+    """Render one page of the home page."""
+    # Render only the first screen; the rest is loaded from /api/articles while scrolling
+    try:
+        page, next_cursor = news_feed.get_article_page(category or None, cursor or None, PAGE_SIZE)
+    except ValueError:
+        # A malformed cursor starts over at the first page
+        page, next_cursor = news_feed.get_article_page(category or None, None, PAGE_SIZE)
     
     return render_template('index.html', 
-                          articles=articles, 
+                          articles=[article_card(a) for a in page], 
                           current_date=current_date,
                           current_year=current_year,
                           current_category=category,
-                          error_message=error_message)
+                          error_message=None,
+                          next_cursor=next_cursor,
+                          stale=stale)
 
-@app.route('/article/<int:article_id>')
+@app.route('/article/<article_id>')
 def article(article_id):
     """Render a single article page."""
-    news_feed = NewsFeed()
     article = news_feed.get_article_by_id(article_id)
     
     if not article:
@@ -108,72 +214,44 @@ def article(article_id):
     current_date = datetime.now().strftime('%A, %B %d, %Y')
     current_year = datetime.now().year
     
-    # Process article text for better readability
-    if article.get('text'):
-        # Split into paragraphs and keep only non-empty ones
-        paragraphs = [p.strip() for p in article['text'].split('\n') if p.strip()]
-        article['paragraphs'] = paragraphs
-    else:
-        article['paragraphs'] = []
-    
-    # Process full content if available
-    if article.get('full_content'):
-        try:
-            # Clean the HTML content
-            soup = BeautifulSoup(article['full_content'], 'html.parser')
-            
-            # Remove potentially harmful elements
-            for s in soup(['script', 'style', 'iframe', 'form']):
-                s.decompose()
-                
-            # Only keep the content HTML
-            article['content_html'] = str(soup)
-        except Exception as e:
-            article['content_html'] = ''
+    # Validated by the article's own version, so other articles changing does not invalidate it
+    etag = make_etag(news_feed.article_version(article_id), 'article', article_id, current_date)
+    timestamp = news_feed.corpus_version()[1]
+    if not_modified(etag, timestamp):
+        return with_validators(None, etag, timestamp)
     
-    return render_template('article.html', 
-                          article=article, 
-                          current_date=current_date,
-                          current_year=current_year)
+    return with_validators(make_response(render_template('article.html', 
+                                                         article=article, 
+                                                         current_date=current_date,
+                                                         current_year=current_year)), etag, timestamp)
 
-@app.route('/api/article/<int:article_id>')
+@app.route('/api/article/<article_id>')
 def api_article(article_id):
     """API endpoint to get article data for modal display."""
     try:
-        news_feed = NewsFeed()
-        article = news_feed.get_article_by_id(article_id)
-        
-        if not article:
+        if not news_feed.get_article_by_id(article_id):
             return jsonify({'error': 'Article not found'}), 404
         
-        # Process article text for better readability
-        if article.get('text'):
-            paragraphs = [p.strip() for p in article['text'].split('\n') if p.strip()]
-            article['paragraphs'] = paragraphs
-        else:
-            article['paragraphs'] = []
+        etag = make_etag(news_feed.article_version(article_id), 'api_article', article_id)
+        timestamp = news_feed.corpus_version()[1]
+        if not_modified(etag, timestamp):
+            return with_validators(None, etag, timestamp)
         
-        # Process full content if available
-        if article.get('full_content'):
-            try:
-                # Clean the HTML content
-                soup = BeautifulSoup(article['full_content'], 'html.parser')
-                
-                # Remove potentially harmful elements
-                for s in soup(['script', 'style', 'iframe', 'form']):
-                    s.decompose()
-                    
-                # Only keep the content HTML
-                article['content_html'] = str(soup)
-            except Exception as e:
-                article['content_html'] = ''
+        # Computes keywords and summary on first access in lazy NLP mode
+        article = news_feed.enrich_article(article_id)
+        if not article:
+            return jsonify({'error': 'Article not found'}), 404
+        # Enrichment stores a new version of the article
+        etag = make_etag(news_feed.article_version(article_id), 'api_article', article_id)
         
-        # Compile the article data for JSON response
+        # Compile the article data for JSON response (content_html and
+        # paragraphs were sanitized and split at ingest)
         article_data = {
             'id': article.get('id'),
             'title': article.get('title'),
             'source': article.get('source'),
             'published': article.get('published'),
+            'published_ts': article.get('published_ts'),
             'authors': article.get('authors', []),
             'url': article.get('url'),
             'image': article.get('image'),
@@ -184,23 +262,104 @@ def api_article(article_id):
             'keywords': article.get('keywords', [])
         }
         
-        return jsonify(article_data)
+        return with_validators(jsonify(article_data), etag, timestamp)
     except Exception as e:
         logger.error(f"Error in API article endpoint: {e}")
         return jsonify({'error': 'An error occurred while processing the article'}), 500
 
+@app.route('/api/articles')
+def api_articles():
+    """API endpoint listing article cards a page at a time, newest first."""
+    category = request.args.get('category', '')
+    cursor = request.args.get('cursor', '')
+    limit = min(max(request.args.get('limit', PAGE_SIZE, type=int), 1), 100)
+    
+    try:
+        articles, next_cursor = news_feed.get_article_page(category or None, cursor or None, limit)
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    except Exception as e:
+        logger.error(f"Error in API articles endpoint: {e}")
+        return jsonify({'error': 'An error occurred while listing articles'}), 500
+    
+    return jsonify({
+        'articles': [article_card(article) for article in articles],
+        'next_cursor': next_cursor
+    })
+
+@app.route('/api/search')
+def api_search():
+    """API endpoint for full-text search over the current articles."""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Missing search query'}), 400
+    
+    category = request.args.get('category', '')
+    source = request.args.get('source', '')
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    
+    try:
+        results = news_feed.search_articles(query, category=category or None, source=source or None,
+                                            limit=limit, offset=offset)
+        total = news_feed.count_search_results(query, category=category or None, source=source or None)
+    except Exception as e:
+        logger.error(f"Error in API search endpoint: {e}")
+        return jsonify({'error': 'An error occurred while searching'}), 500
+    
+    return jsonify({
+        'query': query,
+        'total': total,
+        'results': [{
+            'id': article.get('id'),
+            'title': article.get('title'),
+            'source': article.get('source'),
+            'category': article.get('category'),
+            'published': article.get('published'),
+            'published_ts': article.get('published_ts'),
+            'url': article.get('url'),
+            'image': article.get('image'),
+            'summary': article.get('summary')
+        } for article in results]
+    })
+
+@app.route('/api/status')
+def api_status():
+    """API endpoint reporting the health and polling schedule of each source."""
+    sources = news_feed.source_status()
+    snapshot = news_feed.store.get_snapshot()
+    return jsonify({
+        'refreshing': news_feed.is_refreshing(),
+        'leader': news_feed.leader.is_leader(),
+        'stale': news_feed.is_stale(),
+        'corpus': {
+            'articles': len(snapshot.articles) if snapshot else 0,
+            'generation': snapshot.generation if snapshot else 0,
+            'updated_at': snapshot.timestamp if snapshot else None
+        },
+        'last_refresh': news_feed.last_refresh_stats,
+        'open_circuits': sum(1 for source in sources if source['state'] != 'closed'),
+        'sources': sources
+    })
+
+@app.route('/metrics')
+def metrics():
+    """Counters, timings and gauges in the Prometheus text format."""
+    return app.response_class(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/debug/profile')
+def debug_profile():
+    """Sample every thread's stack for a few seconds and return them in folded (flame graph) format."""
+    if profiler is None:
+        abort(404)
+    seconds = min(max(request.args.get('seconds', 10, type=float), 0.1), 60)
+    return app.response_class(profiler.profile(seconds), mimetype='text/plain')
+
 @app.route('/refresh')
 def refresh_news():
-    """Force refresh the news by clearing the cache."""
+    """Force refresh the news in the background; the current snapshot is served until it finishes."""
     category = request.args.get('category', '')
-    news_feed = NewsFeed()
-    
-    # Clear the cache
-    if os.path.exists(news_feed.cache_file):
-        try:
-            os.remove(news_feed.cache_file)
-        except Exception as e:
-            logger.error(f"Error removing cache file: {e}")
+    news_feed.refresh(wait=False)
     
     # Redirect back to homepage or category page
     if category:
@@ -0,0 +1,543 @@
+import base64
+import bisect
+import email.utils
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from categories import match_categories
+from sanitize import prepare_content
+from storage import BODY_FIELDS, PREVIEW_KEY, PREVIEW_PARAGRAPHS, ArticleDatabase
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {'fbclid', 'gclid', 'cmpid', 'ncid', 'ocid', 'mc_cid', 'mc_eid', 'ref', 'rss', 'src'}
+
+# Article fields held in ArticleRecord slots; any other metadata goes in its extra dict
+RECORD_FIELDS = ('id', 'title', 'url', 'source', 'category', 'categories', 'published', 'published_ts',
+                 'summary', 'image', 'images', 'authors', 'keywords')
+_RECORD_FIELDS = frozenset(RECORD_FIELDS)
+# Fields whose values repeat across many articles and are shared through sys.intern
+_INTERNED_FIELDS = frozenset(('source', 'category'))
+_LIST_FIELDS = frozenset(('categories', 'images', 'authors', 'keywords'))
+
+
+def normalize_url(url: str) -> str:
+    """Canonicalize an article URL so that links to the same story compare equal.
+
+    Lowercases the host, drops "www.", the fragment, default ports, trailing
+    slashes and tracking parameters, sorts the query and treats http and
+    https as the same.
+    """
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip('/') or '/'
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit(('https', host, path, urlencode(query), ''))
+
+
+def make_article_id(url: str, fallback: str = '') -> str:
+    """Stable article ID derived from the canonical URL (or fallback text if there is no URL)."""
+    key = normalize_url(url) if url else fallback
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+
+def parse_timestamp(value: str) -> Optional[float]:
+    """Epoch seconds of a date string from a feed (RFC 822 or ISO 8601), or None if it cannot be parsed."""
+    value = (value or '').strip()
+    if not value:
+        return None
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if parsed.tzinfo is None and value.endswith(('-0000', '+0000', 'GMT', 'UT')):
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def time_order_key(article: Dict[str, Any]) -> Tuple[float, str]:
+    """Sort key for newest-first order; ties are broken by ID so the order is stable."""
+    return -article.get('published_ts', 0), article['id']
+
+
+def merge_by_time(*runs: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Merge article lists that are each already newest first, without re-sorting them."""
+    return list(heapq.merge(*runs, key=time_order_key))
+
+
+def encode_cursor(article: Dict[str, Any]) -> str:
+    """Opaque pagination cursor pointing just after an article in time order."""
+    raw = json.dumps([article.get('published_ts', 0), article['id']], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    """Time order key (see time_order_key) encoded in a cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        published_ts, article_id = json.loads(raw)
+        return -float(published_ts), str(article_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+class ArticleRecord:
+    """Compact, read-only article as held in a snapshot.
+
+    The card metadata lives in slots, with source and category strings
+    interned so that every article of a source shares one copy, and list
+    fields stored as tuples. The body (BODY_FIELDS) is not kept: it is read
+    through `loader` whenever something asks for it, e.g. the article page,
+    and only the first PREVIEW_PARAGRAPHS paragraphs are kept for cards.
+    The database stores those with the metadata (PREVIEW_KEY), so cards
+    never need the body.
+
+    Supports the read-only part of the dict interface (article['title'],
+    get(), `in`, keys()), so dict(record) gives the full article, body included.
+
+    `version` is the database generation this version of the article was
+    written in, or None if it was not persisted.
+    """
+    __slots__ = RECORD_FIELDS + ('version', '_preview', '_extra', '_body', '_loader')
+
+    def __init__(self, article: Dict[str, Any],
+                 loader: Optional[Callable[['ArticleRecord'], Optional[Dict[str, Any]]]] = None,
+                 version: Optional[int] = None):
+        """
+        Args:
+            article: Article dict, with or without its body fields
+            loader: Reads the body fields of a record from storage; if None,
+                the body fields of `article` are kept in memory instead
+            version: Generation the article was written in
+        """
+        self.version = version
+        extra = None
+        for key, value in article.items():
+            if key in BODY_FIELDS or key == PREVIEW_KEY:
+                continue
+            if key in _RECORD_FIELDS:
+                setattr(self, key, _compact(key, value))
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        self._extra = extra
+        paragraphs = article.get('paragraphs', article.get(PREVIEW_KEY))
+        # A tuple, or a holder filled from the body on first use and shared with copies (see replace())
+        self._preview = tuple(paragraphs[:PREVIEW_PARAGRAPHS]) if paragraphs is not None else []
+        self._loader = loader
+        self._body = None if loader is not None else {key: article[key] for key in BODY_FIELDS if key in article}
+
+    @property
+    def preview(self) -> Tuple[str, ...]:
+        """The first paragraphs of the article, for cards."""
+        preview = self._preview
+        if isinstance(preview, list):
+            # Stored without a preview by an older version: read it from the body once
+            if not preview:
+                preview.append(tuple(self.body().get('paragraphs', ())[:PREVIEW_PARAGRAPHS]))
+            return preview[0]
+        return preview
+
+    def body(self) -> Dict[str, Any]:
+        """The BODY_FIELDS of the article, read from storage unless they are held in memory."""
+        if self._loader is None:
+            return self._body
+        return self._loader(self) or {}
+
+    def replace(self, **changes) -> 'ArticleRecord':
+        """A copy with some metadata fields changed, sharing the body."""
+        record = ArticleRecord.__new__(ArticleRecord)
+        for key in ArticleRecord.__slots__:
+            value = getattr(self, key, _MISSING)
+            if value is not _MISSING:
+                setattr(record, key, value)
+        for key, value in changes.items():
+            if key in _RECORD_FIELDS:
+                setattr(record, key, _compact(key, value))
+            else:
+                record._extra = dict(record._extra or {}, **{key: value})
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The full article as a plain dict, body included."""
+        article = {key: list(value) if key in _LIST_FIELDS else value
+                   for key in RECORD_FIELDS for value in (getattr(self, key, _MISSING),) if value is not _MISSING}
+        article.update(self._extra or {})
+        article.update(self.body())
+        return article
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _RECORD_FIELDS:
+            value = getattr(self, key, _MISSING)
+        elif key in BODY_FIELDS:
+            value = self.body().get(key, _MISSING)
+        else:
+            value = (self._extra or {}).get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in _RECORD_FIELDS:
+            return getattr(self, key, default)
+        if key in BODY_FIELDS:
+            return self.body().get(key, default)
+        return (self._extra or {}).get(key, default)
+
+    def __contains__(self, key: str) -> bool:
+        if key in _RECORD_FIELDS:
+            return hasattr(self, key)
+        if key in BODY_FIELDS:
+            return key in self.body()
+        return key in (self._extra or {})
+
+    def keys(self):
+        return self.to_dict().keys()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __repr__(self) -> str:
+        return f"ArticleRecord(id={getattr(self, 'id', None)!r}, title={getattr(self, 'title', None)!r})"
+
+
+_MISSING = object()
+
+
+def _compact(key: str, value: Any) -> Any:
+    """Value of a record field in its compact form: tuples for lists and interned shared strings."""
+    if key in _LIST_FIELDS and isinstance(value, list):
+        return tuple(sys.intern(item) if key == 'categories' and isinstance(item, str) else item for item in value)
+    if key in _INTERNED_FIELDS and isinstance(value, str):
+        return sys.intern(value)
+    return value
+
+
+class ArticleSnapshot:
+    """The article corpus as of one refresh.
+
+    Articles are ordered newest first by their parsed publish time
+    (published_ts), so newest() and since() are slices rather than sorts.
+    Those published by ArticleStore are ArticleRecords.
+
+    Snapshots are never modified in place after they are published; a refresh
+    builds a new one and swaps it in, so readers can use a snapshot without
+    locking. The only exception is ArticleStore.update(), which swaps in new
+    versions of single articles (see replace()) and advances the generation.
+    The published generation only changes with a refresh, so it identifies
+    the listings, which updates do not change.
+    """
+
+    def __init__(self, articles: List[Dict[str, Any]], timestamp: float, generation: int,
+                 published_generation: Optional[int] = None):
+        self.articles = articles
+        self.timestamp = timestamp
+        self.generation = generation
+        self.published_generation = generation if published_generation is None else published_generation
+        # Negated publish times, ascending, for bisecting on time
+        self._times = [-article.get('published_ts', 0) for article in articles]
+        self.by_id = {article['id']: article for article in articles}
+        self._positions = {article['id']: i for i, article in enumerate(articles)}
+        # Inverted index of category -> article IDs, in display order
+        self.category_index: Dict[str, List[str]] = {}
+        for article in articles:
+            for category in article.get('categories', ()):
+                self.category_index.setdefault(category, []).append(article['id'])
+
+    def get(self, article_id: str) -> Optional[Dict[str, Any]]:
+        """Look up an article by its stable ID."""
+        return self.by_id.get(article_id)
+
+    def replace(self, article: Dict[str, Any]):
+        """Swap in an updated version of an article, e.g. after enrichment."""
+        position = self._positions.get(article['id'])
+        if position is not None:
+            self.by_id[article['id']] = article
+            self.articles[position] = article
+
+    def in_category(self, category: str) -> List[Dict[str, Any]]:
+        """Articles assigned to a category at ingest, in display order."""
+        return [self.by_id[article_id] for article_id in self.category_index.get(category, ())]
+
+    def newest(self, limit: int, category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """The `limit` most recently published articles, optionally within a category."""
+        if category is None:
+            return self.articles[:limit]
+        return [self.by_id[article_id] for article_id in self.category_index.get(category, ())[:limit]]
+
+    def page(self, limit: int, after: Optional[Tuple[float, str]] = None,
+             category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Up to `limit` articles following the time order key `after`, newest first.
+
+        Pages are anchored on a key rather than an offset, so articles
+        published between two requests do not shift the next page.
+        """
+        if category is None:
+            ids = None
+            count = len(self.articles)
+            key_at = lambda i: time_order_key(self.articles[i])
+        else:
+            ids = self.category_index.get(category, [])
+            count = len(ids)
+            key_at = lambda i: time_order_key(self.by_id[ids[i]])
+        start = 0
+        if after is not None:
+            hi = count
+            while start < hi:
+                mid = (start + hi) // 2
+                if key_at(mid) <= after:
+                    start = mid + 1
+                else:
+                    hi = mid
+        if ids is None:
+            return self.articles[start:start + limit]
+        return [self.by_id[article_id] for article_id in ids[start:start + limit]]
+
+    def since(self, timestamp: float, category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Articles published at or after `timestamp` (epoch seconds), newest first."""
+        if category is None:
+            return self.articles[:bisect.bisect_right(self._times, -timestamp)]
+        articles = (self.by_id[article_id] for article_id in self.category_index.get(category, ()))
+        return list(itertools.takewhile(lambda article: article.get('published_ts', 0) >= timestamp, articles))
+
+
+def _migrate_legacy(article: Dict[str, Any], timestamp: float) -> Dict[str, Any]:
+    """Fill in the fields that articles from older JSON caches do not have."""
+    # Caches written before articles carried IDs
+    if 'id' not in article:
+        article['id'] = make_article_id(article.get('url', ''), f"{article.get('source', '')}:{article.get('title', '')}")
+    # ... or before categories were computed at ingest
+    if 'categories' not in article:
+        category = article.get('category', '').lower()
+        text = ' '.join([article.get('title', ''), article.get('summary', ''), article.get('text', '')])
+        article['categories'] = [category] + [c for c in match_categories(text) if c != category]
+    # ... or before article HTML was sanitized at ingest
+    if 'paragraphs' not in article:
+        article.update(prepare_content(article.get('full_content', ''), article.get('text', '')))
+    # ... or before publish times were parsed at ingest
+    if 'published_ts' not in article:
+        article['published_ts'] = parse_timestamp(article.get('published', '')) or timestamp
+    return article
+
+
+class ArticleStore:
+    """Process-wide, in-memory view of the article database.
+
+    The corpus is read from the database once and kept in memory as a
+    snapshot. When another process commits, only the articles written since
+    the generation this process last loaded are read back and merged in, so
+    reloads cost the size of the change rather than of the corpus.
+
+    Articles are kept until they have not been seen in any feed for
+    `retention` seconds, so history builds up across refreshes. Only their
+    metadata is held in memory, as ArticleRecords; bodies are read from the
+    database when needed, and the most recently used ones are cached.
+    """
+
+    def __init__(self, db_path: str = 'articles.db', retention: float = 7 * 86400,
+                 legacy_cache_file: Optional[str] = None, body_cache_size: int = 256):
+        """
+        Args:
+            db_path: SQLite database file
+            retention: Seconds an article is kept after it was last seen in a feed
+            legacy_cache_file: JSON article cache from earlier versions, imported
+                into an empty database
+            body_cache_size: Article bodies kept in memory after they were read
+        """
+        self.db = ArticleDatabase(db_path)
+        self.retention = retention
+        self.body_cache_size = body_cache_size
+        # ArticleRecord -> body, least recently used first; a new version of an
+        # article is a new record, so cached bodies never go stale
+        self._bodies: 'OrderedDict[ArticleRecord, Dict[str, Any]]' = OrderedDict()
+        self._bodies_lock = threading.Lock()
+        self._snapshot = None
+        self._data_version = None  # database data_version the snapshot reflects
+        self._lock = threading.Lock()
+        if legacy_cache_file and self.db.state()[0] == 0 and os.path.exists(legacy_cache_file):
+            self._import_legacy(legacy_cache_file)
+
+    def _import_legacy(self, cache_file: str):
+        try:
+            with open(cache_file, 'r') as f:
+                cache = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            logger.error(f"Error reading cache file: {e}")
+            return
+        timestamp = cache.get('timestamp', 0)
+        articles = [_migrate_legacy(article, timestamp) for article in cache.get('articles', [])]
+        self.db.write(articles, seen_at=timestamp, timestamp=timestamp)
+        logger.info(f"Imported {len(articles)} articles from {cache_file}")
+
+    def get_snapshot(self) -> Optional[ArticleSnapshot]:
+        """Return the current snapshot, or None if nothing has been published yet."""
+        # Readers only wait for the very first load; afterwards a reader that
+        # finds a write or reload in progress serves the current snapshot
+        if self._lock.acquire(blocking=self._snapshot is None):
+            try:
+                self._reload()
+            finally:
+                self._lock.release()
+        return self._snapshot
+
+    def _reload(self):
+        """Merge in what other processes wrote since the snapshot was loaded."""
+        data_version = self.db.data_version()
+        if data_version == self._data_version:
+            return
+        self._data_version = data_version
+        current = self._snapshot.generation if self._snapshot else 0
+        if self.db.state()[0] != current:
+            self._load_since(current)
+
+    def _load_since(self, generation: int):
+        changes = self.db.load(since_generation=generation, with_bodies=False)
+        records = [ArticleRecord(article, self.load_body, changes.versions[article['id']])
+                   for article in changes.articles]
+        self._merge(records, changes.generation, changes.published_generation, changes.timestamp,
+                    lambda article_id: article_id in changes.ids)
+        logger.info(f"Loaded {len(records)} changed articles from {self.db.path} "
+                    f"(generation {changes.generation}, {len(self._snapshot.articles)} articles)")
+
+    def _records(self, articles: List[Dict[str, Any]], generation: Optional[int]) -> List[ArticleRecord]:
+        """Compact records of articles written in `generation`; if they could not be
+        persisted (None), their bodies are kept in memory."""
+        if generation is None:
+            return [ArticleRecord(article) for article in articles]
+        return [ArticleRecord(article, self.load_body, generation) for article in articles]
+
+    def load_body(self, record: ArticleRecord) -> Optional[Dict[str, Any]]:
+        """The BODY_FIELDS of an article, from the cache or the database."""
+        with self._bodies_lock:
+            body = self._bodies.get(record)
+            if body is not None:
+                self._bodies.move_to_end(record)
+                return body
+        try:
+            body = self.db.load_body(record.id)
+        except sqlite3.Error as e:
+            logger.error(f"Error reading article {record.id} from {self.db.path}: {e}")
+            return None
+        if body is not None and self.body_cache_size > 0:
+            with self._bodies_lock:
+                self._bodies[record] = body
+                while len(self._bodies) > self.body_cache_size:
+                    self._bodies.popitem(last=False)
+        return body
+
+    def _merge(self, changed: List[ArticleRecord], generation: int, published_generation: int,
+               timestamp: float, keep):
+        """Swap in a snapshot of the current articles with `changed` (newest first) upserted."""
+        changed_ids = {article['id'] for article in changed}
+        unchanged = [article for article in (self._snapshot.articles if self._snapshot else [])
+                     if article['id'] not in changed_ids and keep(article['id'])]
+        self._snapshot = ArticleSnapshot(merge_by_time(changed, unchanged), timestamp, generation,
+                                         published_generation)
+
+    def publish(self, articles: List[Dict[str, Any]]) -> ArticleSnapshot:
+        """Add or update articles seen in a feed just now and swap in a new snapshot.
+
+        Articles that have not been seen for `retention` seconds are dropped
+        at the same time. Articles that are stored as they are keep their
+        record, and with it their version.
+
+        Args:
+            articles: JSON-serializable articles, newest first (see time_order_key)
+
+        Returns:
+            The new snapshot.
+        """
+        with self._lock:
+            self._reload()
+            current = self._snapshot.generation if self._snapshot else 0
+            now = time.time()
+            expire_before = now - self.retention
+            try:
+                result = self.db.write(articles, seen_at=now, expire_before=expire_before, timestamp=now)
+            except sqlite3.Error as e:
+                # Serve the new articles from memory even if they could not be persisted
+                logger.error(f"Error writing articles to {self.db.path}: {e}")
+                result = None
+            if result is None:
+                # Still a new listing, though nothing new was persisted (or expired)
+                published = (self._snapshot.published_generation if self._snapshot else 0) + 1
+                self._merge(self._records(articles, None), current, published, now, lambda article_id: True)
+            elif result.generation == current + 1:
+                stored = self._snapshot.by_id if self._snapshot else {}
+                changed = [article for article in articles
+                           if article['id'] not in result.unchanged or article['id'] not in stored]
+                self._merge(self._records(changed, result.generation), result.generation, result.generation, now,
+                            lambda article_id: article_id not in result.expired)
+            else:
+                # Another process wrote in between; read its changes along with ours
+                self._load_since(current)
+            return self._snapshot
+
+    def update(self, articles: List[Dict[str, Any]]):
+        """Store new versions of articles already in the corpus, e.g. after enrichment.
+
+        Unlike publish(), this does not count the articles as seen in a feed.
+        """
+        with self._lock:
+            self._reload()
+            snapshot = self._snapshot
+            articles = [article for article in articles if snapshot is not None and article['id'] in snapshot.by_id]
+            if not articles:
+                return
+            try:
+                result = self.db.write(articles)
+            except sqlite3.Error as e:
+                logger.error(f"Error writing articles to {self.db.path}: {e}")
+                result = None
+            if result is not None and result.generation != snapshot.generation + 1:
+                self._load_since(snapshot.generation)
+                return
+            unchanged = result.unchanged if result is not None else set()
+            changed = [article for article in articles if article['id'] not in unchanged]
+            for record in self._records(changed, result.generation if result is not None else None):
+                snapshot.replace(record)
+            if result is not None:
+                snapshot.generation = result.generation
+
+    def request_refresh(self):
+        """Ask whichever process crawls for this database to refresh every source."""
+        try:
+            self.db.set_meta('refresh_requested', str(time.time()))
+        except sqlite3.Error as e:
+            logger.error(f"Error requesting a refresh through {self.db.path}: {e}")
+
+    def refresh_requested_at(self) -> float:
+        """When a refresh was last requested through request_refresh(), or 0."""
+        try:
+            return float(self.db.get_meta('refresh_requested') or 0)
+        except sqlite3.Error as e:
+            logger.error(f"Error reading {self.db.path}: {e}")
+            return 0.0
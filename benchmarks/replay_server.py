@@ -0,0 +1,246 @@
+import argparse
+import hashlib
+import html
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import feedparser  # noqa: E402
+
+from http_client import HttpClient  # noqa: E402
+from news_aggregator import NewsFeed, NewsSource  # noqa: E402
+from synthetic import CATEGORIES, make_article_page, make_feed  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+# Stands for the server's base URL in recorded feeds
+PLACEHOLDER = '{{replay}}'
+
+
+class ReplayServer:
+    """Local HTTP stand-in for the feed and article hosts.
+
+    Serves GET /feed/<name>.xml and GET /article/<key>.html, either from a
+    directory written by record() or generated by synthetic.py. Every
+    response can be delayed and a share of them answered with 503, and some
+    feeds can be made to always fail. Feeds carry an ETag, so conditional
+    refreshes get 304 Not Modified as from a real server.
+    """
+
+    def __init__(self, recordings: Optional[str] = None, feeds: int = 20, entries: int = 10,
+                 latency: float = 0.0, jitter: float = 0.0, failure_rate: float = 0.0,
+                 dead_feeds: int = 0, seed: int = 0):
+        """
+        Args:
+            recordings: Directory written by record(); synthetic feeds are served if None
+            feeds: Number of synthetic feeds
+            entries: Entries per synthetic feed
+            latency: Mean seconds added to every response
+            jitter: Standard deviation of the added latency
+            failure_rate: Share of requests answered with 503 Service Unavailable
+            dead_feeds: Number of feeds that always answer 503
+            seed: Seed for latency and failure injection
+        """
+        self.recordings = recordings
+        self.feed_count = feeds
+        self.entries = entries
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.dead_feeds = dead_feeds
+        self.stats = {'feeds': 0, 'articles': 0, 'not_modified': 0, 'failed': 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._feeds: Dict[str, bytes] = {}
+        self._feed_info: List[Dict[str, str]] = []
+        self._articles: Dict[str, bytes] = {}
+        self._server = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self, port: int = 0) -> 'ReplayServer':
+        """Start serving on a daemon thread."""
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self._server.daemon_threads = True
+        self._load()
+        threading.Thread(target=self._server.serve_forever, name='replay-server', daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def sources(self) -> List[NewsSource]:
+        """News sources pointing at this server."""
+        return [NewsSource(info['name'], f"{self.base_url}/feed/{info['file']}", category=info['category'])
+                for info in self._feed_info]
+
+    def _load(self):
+        if self.recordings:
+            with open(os.path.join(self.recordings, 'feeds.json')) as f:
+                self._feed_info = json.load(f)
+            for info in self._feed_info:
+                with open(os.path.join(self.recordings, 'feeds', info['file']), 'rb') as f:
+                    self._feeds[info['file']] = f.read().replace(PLACEHOLDER.encode(), self.base_url.encode())
+            articles_dir = os.path.join(self.recordings, 'articles')
+            for name in os.listdir(articles_dir):
+                with open(os.path.join(articles_dir, name), 'rb') as f:
+                    self._articles[name] = f.read()
+        else:
+            for feed in range(self.feed_count):
+                info = {'file': f"synthetic-{feed}.xml", 'name': f"Synthetic {feed}",
+                        'category': CATEGORIES[feed % len(CATEGORIES)]}
+                self._feed_info.append(info)
+                self._feeds[info['file']] = make_feed(self.base_url, feed, self.entries)
+        self._dead = {info['file'] for info in self._feed_info[:self.dead_feeds]}
+
+    def _article(self, name: str) -> Optional[bytes]:
+        if self.recordings:
+            return self._articles.get(name)
+        if not re.fullmatch(r'\d+-\d+\.html', name):
+            return None
+        return make_article_page(name[:-len('.html')])
+
+    def _inject(self) -> bool:
+        """Sleep for the configured latency; True if this request should fail."""
+        with self._lock:
+            delay = max(self._random.gauss(self.latency, self.jitter), 0) if self.latency or self.jitter else 0
+            fail = self._random.random() < self.failure_rate
+        if delay:
+            time.sleep(delay)
+        return fail
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: bytes = b'', headers: Optional[Dict[str, str]] = None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                kind, _, name = self.path.lstrip('/').partition('/')
+                fail = server._inject()
+                if kind == 'feed' and name in server._feeds:
+                    if fail or name in server._dead:
+                        server._count('failed')
+                        return self._send(503)
+                    server._count('feeds')
+                    body = server._feeds[name]
+                    etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+                    if self.headers.get('If-None-Match') == etag:
+                        server._count('not_modified')
+                        return self._send(304, headers={'ETag': etag})
+                    return self._send(200, body, {'Content-Type': 'application/rss+xml', 'ETag': etag})
+                body = server._article(name) if kind == 'article' else None
+                if body is None:
+                    return self._send(404)
+                if fail:
+                    server._count('failed')
+                    return self._send(503)
+                server._count('articles')
+                return self._send(200, body, {'Content-Type': 'text/html; charset=utf-8'})
+
+        return Handler
+
+
+def record(out_dir: str, sources: List[NewsSource], articles_per_feed: int = 10,
+           http_client: Optional[HttpClient] = None):
+    """Save live feeds and their article pages for replay.
+
+    Article links in the saved feeds are rewritten to point at the replay server.
+    """
+    http_client = http_client or HttpClient()
+    os.makedirs(os.path.join(out_dir, 'feeds'), exist_ok=True)
+    os.makedirs(os.path.join(out_dir, 'articles'), exist_ok=True)
+    feed_info = []
+    for source in sources:
+        try:
+            response = http_client.get(source.url)
+            response.raise_for_status()
+        except Exception as e:
+            logger.warning(f"Skipping {source.name}: {e}")
+            continue
+        content = response.content
+        for entry in feedparser.parse(content).entries[:articles_per_feed]:
+            link = entry.get('link', '')
+            if not link:
+                continue
+            try:
+                page = http_client.get(link)
+                page.raise_for_status()
+            except Exception as e:
+                logger.warning(f"Skipping article {link}: {e}")
+                continue
+            key = hashlib.sha1(link.encode('utf-8')).hexdigest()[:16] + '.html'
+            with open(os.path.join(out_dir, 'articles', key), 'wb') as f:
+                f.write(page.content)
+            replay_link = f"{PLACEHOLDER}/article/{key}".encode()
+            for variant in {link, html.escape(link)}:
+                content = content.replace(variant.encode('utf-8'), replay_link)
+        file_name = re.sub(r'[^a-z0-9]+', '-', source.name.lower()).strip('-') + '.xml'
+        with open(os.path.join(out_dir, 'feeds', file_name), 'wb') as f:
+            f.write(content)
+        feed_info.append({'file': file_name, 'name': source.name, 'category': source.category})
+        logger.info(f"Recorded {source.name}")
+    with open(os.path.join(out_dir, 'feeds.json'), 'w') as f:
+        json.dump(feed_info, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record live feeds, or serve recorded or synthetic ones locally.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    record_parser = commands.add_parser('record', help="record the configured sources' feeds and articles")
+    record_parser.add_argument('out_dir')
+    record_parser.add_argument('--articles', type=int, default=10, help='article pages to record per feed')
+    serve_parser = commands.add_parser('serve', help='serve feeds until interrupted')
+    serve_parser.add_argument('--recordings', help='directory written by the record command (default: synthetic feeds)')
+    serve_parser.add_argument('--port', type=int, default=8800)
+    serve_parser.add_argument('--feeds', type=int, default=20)
+    serve_parser.add_argument('--latency', type=float, default=0.0)
+    serve_parser.add_argument('--jitter', type=float, default=0.0)
+    serve_parser.add_argument('--failure-rate', type=float, default=0.0)
+    serve_parser.add_argument('--dead-feeds', type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == 'record':
+        record(args.out_dir, NewsFeed._initialize_sources(), args.articles)
+        return
+    server = ReplayServer(args.recordings, feeds=args.feeds, latency=args.latency, jitter=args.jitter,
+                          failure_rate=args.failure_rate, dead_feeds=args.dead_feeds).start(args.port)
+    for source in server.sources():
+        print(f"{source.name}: {source.url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
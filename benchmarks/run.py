@@ -0,0 +1,230 @@
+"""Offline benchmarks for refreshing and serving news.
+
+Runs entirely against a local replay server (see replay_server.py) and
+synthetic corpora, so results don't depend on the live outlets:
+
+    refresh   a cold crawl into an empty database (time to the first
+              published articles and to the end of the crawl), then a warm
+              re-crawl where feeds answer 304 and extractions are cached
+    corpus    for each corpus size: writing the corpus, cold loads of a new
+              NewsFeed from the database, warm get_articles() calls (all,
+              first page, one category) and the Flask routes through the
+              test client
+
+Usage:
+    python benchmarks/run.py [--sizes 100,1000,10000,50000] [--json results.json]
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from article_store import ArticleStore  # noqa: E402
+from news_aggregator import NewsFeed  # noqa: E402
+from page_cache import PageCache  # noqa: E402
+from replay_server import ReplayServer  # noqa: E402
+from synthetic import CATEGORIES, make_corpus  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+def summarize(name: str, samples: List[float], **extra) -> Dict[str, Any]:
+    """Latency percentiles (ms) and throughput of timed calls."""
+    result = {
+        'name': name,
+        'n': len(samples),
+        'p50_ms': percentile(samples, 50) * 1000,
+        'p99_ms': percentile(samples, 99) * 1000,
+        'mean_ms': statistics.fmean(samples) * 1000,
+        'ops_per_s': len(samples) / sum(samples) if sum(samples) else float('inf')
+    }
+    result.update(extra)
+    return result
+
+
+def timed(fn: Callable[[], Any], repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def peak_memory(fn: Callable[[], Any]) -> Dict[str, float]:
+    """Peak Python heap (MB) while running fn, and what fn's result retains."""
+    tracemalloc.start()
+    try:
+        result = fn()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return {'peak_mb': peak / 2 ** 20, 'retained_mb': current / 2 ** 20}
+
+
+def bench_refresh(args, workdir: str) -> List[Dict[str, Any]]:
+    server = ReplayServer(args.recordings, feeds=args.feeds, entries=args.entries, latency=args.latency,
+                          jitter=args.jitter, failure_rate=args.failure_rate, dead_feeds=args.dead_feeds).start()
+    try:
+        feed = NewsFeed(sources=server.sources(), storage_path=os.path.join(workdir, 'refresh.db'),
+                        extraction_workers=args.extraction_workers, nlp_mode=args.nlp_mode)
+        started = time.perf_counter()
+        first = feed.get_articles()
+        first_articles = time.perf_counter() - started
+        # Waits for the crawl started by get_articles() to finish
+        feed.refresh(wait=True)
+        cold = time.perf_counter() - started
+        articles = len(feed.get_articles())
+        cold_requests = dict(server.stats)
+
+        started = time.perf_counter()
+        feed.refresh(wait=True)
+        warm = time.perf_counter() - started
+        warm_requests = {key: server.stats[key] - cold_requests[key] for key in server.stats}
+        feed.extractor.shutdown()
+    finally:
+        server.stop()
+    sources = len(server.sources())
+    return [
+        {'name': 'refresh cold: first articles', 'seconds': first_articles, 'articles': len(first)},
+        {'name': 'refresh cold: full crawl', 'seconds': cold, 'articles': articles, 'sources': sources,
+         'sources_per_s': sources / cold, 'requests': cold_requests},
+        {'name': 'refresh warm: full crawl', 'seconds': warm, 'sources': sources,
+         'sources_per_s': sources / warm, 'requests': warm_requests}
+    ]
+
+
+def serving_feed(db_path: str) -> NewsFeed:
+    # No sources, so nothing is ever due and no crawl interferes with the measurements
+    return NewsFeed(sources=[], storage_path=db_path, extraction_workers=0, nlp_mode='skip')
+
+
+def cold_load(db_path: str) -> NewsFeed:
+    feed = serving_feed(db_path)
+    feed.get_articles(limit=20)
+    return feed
+
+
+def bench_corpus(size: int, args, workdir: str, app_module) -> List[Dict[str, Any]]:
+    db_path = os.path.join(workdir, f"corpus-{size}.db")
+    corpus = make_corpus(size)
+    started = time.perf_counter()
+    ArticleStore(db_path).publish(corpus)
+    write = time.perf_counter() - started
+    results = [{'name': 'write corpus', 'seconds': write, 'articles_per_s': size / write}]
+    sample_id = corpus[len(corpus) // 2]['id']
+    del corpus
+
+    cold = timed(lambda: cold_load(db_path), args.cold_runs)
+    results.append(summarize('get_articles cold', cold, **peak_memory(lambda: cold_load(db_path))))
+
+    feed = serving_feed(db_path)
+    feed.get_articles()
+    category = CATEGORIES[2]
+    results.append(summarize('get_articles warm: all', timed(feed.get_articles, args.requests)))
+    results.append(summarize('get_articles warm: first page', timed(lambda: feed.get_articles(limit=20), args.requests)))
+    results.append(summarize(f"get_articles warm: category={category}",
+                             timed(lambda: feed.get_articles(category), args.requests)))
+    results.append(summarize('get_article_page warm', timed(lambda: feed.get_article_page(None, None, 20), args.requests)))
+
+    app_module.news_feed = feed
+    app_module.page_cache = PageCache()
+    client = app_module.app.test_client()
+    etag = client.get('/').headers.get('ETag')
+    routes = [
+        ('GET /', {}, '/'),
+        ('GET / (If-None-Match)', {'If-None-Match': etag}, '/'),
+        (f"GET /?category={category}", {}, f"/?category={category}"),
+        ('GET /api/articles', {}, '/api/articles'),
+        (f"GET /api/articles?category={category}", {}, f"/api/articles?category={category}"),
+        ('GET /api/article/<id>', {}, f"/api/article/{sample_id}"),
+        ('GET /api/search?q=climate', {}, '/api/search?q=climate')
+    ]
+    for name, headers, path in routes:
+        status = client.get(path, headers=headers).status_code
+        results.append(summarize(name, timed(lambda: client.get(path, headers=headers), args.requests),
+                                 status=status))
+    return results
+
+
+def print_results(title: str, results: List[Dict[str, Any]]):
+    print(f"\n== {title}")
+    for result in results:
+        if 'p50_ms' in result:
+            line = (f"  {result['name']:<40} p50 {result['p50_ms']:9.3f} ms  p99 {result['p99_ms']:9.3f} ms  "
+                    f"{result['ops_per_s']:10.1f}/s")
+            if 'peak_mb' in result:
+                line += f"  peak {result['peak_mb']:.1f} MB, retained {result['retained_mb']:.1f} MB"
+            if result.get('status', 200) != 200:
+                line += f"  (HTTP {result['status']})"
+        else:
+            line = f"  {result['name']:<40} {result['seconds']:9.3f} s"
+            line += ''.join(f"  {key} {value:.1f}" if isinstance(value, float) else f"  {key} {value}"
+                            for key, value in result.items() if key not in ('name', 'seconds'))
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline refresh and serving benchmarks.')
+    parser.add_argument('--sizes', default='100,1000,10000,50000', help='comma-separated corpus sizes')
+    parser.add_argument('--requests', type=int, default=200, help='timed calls per warm benchmark')
+    parser.add_argument('--cold-runs', type=int, default=5, help='timed cold loads per corpus size')
+    parser.add_argument('--skip-refresh', action='store_true', help='only run the corpus benchmarks')
+    parser.add_argument('--recordings', help='replay recorded feeds (see replay_server.py record)')
+    parser.add_argument('--feeds', type=int, default=20, help='synthetic feeds to crawl')
+    parser.add_argument('--entries', type=int, default=10, help='entries per synthetic feed')
+    parser.add_argument('--latency', type=float, default=0.05, help='mean seconds added to each response')
+    parser.add_argument('--jitter', type=float, default=0.02, help='standard deviation of the added latency')
+    parser.add_argument('--failure-rate', type=float, default=0.02, help='share of responses that are 503')
+    parser.add_argument('--dead-feeds', type=int, default=1, help='feeds that always fail')
+    parser.add_argument('--extraction-workers', type=int, default=None, help='parsing processes (default: CPU count)')
+    parser.add_argument('--nlp-mode', default='skip', help='NLP mode for the refresh benchmark')
+    parser.add_argument('--json', help='also write the results to this file')
+    parser.add_argument('--verbose', action='store_true', help='show the application log')
+    args = parser.parse_args()
+
+    if not args.verbose:
+        # Injected failures are logged as errors by the application
+        logging.disable(logging.CRITICAL)
+    json_path = os.path.abspath(args.json) if args.json else None
+    if args.recordings:
+        args.recordings = os.path.abspath(args.recordings)
+    report = {}
+    with tempfile.TemporaryDirectory(prefix='news-bench-') as workdir:
+        # Anything the application writes next to the code ends up in the temporary directory
+        os.chdir(workdir)
+        os.environ['NEWS_DB_PATH'] = os.path.join(workdir, 'app.db')
+        os.environ['NEWS_BACKGROUND_REFRESH'] = '0'
+        import app as app_module
+        app_feed = app_module.news_feed
+
+        if not args.skip_refresh:
+            report['refresh'] = bench_refresh(args, workdir)
+            print_results(f"refresh ({args.feeds} feeds, {args.latency * 1000:.0f} ms latency, "
+                          f"{args.failure_rate:.0%} failures, {args.dead_feeds} dead)", report['refresh'])
+        for size in (int(size) for size in args.sizes.split(',')):
+            report[f"corpus-{size}"] = bench_corpus(size, args, workdir, app_module)
+            print_results(f"corpus of {size} articles", report[f"corpus-{size}"])
+        app_feed.extractor.shutdown()
+
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
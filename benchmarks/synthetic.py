@@ -0,0 +1,94 @@
+import html
+import random
+import time
+from email.utils import formatdate
+from typing import Any, Dict, List
+
+from article_store import make_article_id, time_order_key
+from categories import CATEGORY_KEYWORDS
+
+CATEGORIES = list(CATEGORY_KEYWORDS)
+
+# Everyday news vocabulary mixed with the category keywords, so that text
+# looks roughly like news to the classifier, search index and deduplicator
+WORDS = sorted({word for keywords in CATEGORY_KEYWORDS.values() for keyword in keywords for word in keyword.split()} | {
+    'report', 'officials', 'said', 'week', 'city', 'plan', 'new', 'first', 'year', 'government', 'council',
+    'vote', 'season', 'record', 'team', 'company', 'data', 'study', 'results', 'court', 'ruling', 'deal',
+    'talks', 'leaders', 'crisis', 'growth', 'prices', 'energy', 'water', 'school', 'students', 'police',
+    'workers', 'strike', 'launch', 'rules', 'public', 'local', 'national', 'election', 'campaign', 'storm',
+    'travel', 'festival', 'award', 'review', 'interview', 'analysis', 'update', 'million', 'billion', 'after',
+    'before', 'amid', 'over', 'warns', 'calls', 'opens', 'falls', 'rises', 'faces', 'wins', 'loses', 'plans'
+})
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def make_article(index: int, now: float = None, paragraphs: int = 8) -> Dict[str, Any]:
+    """A processed article as stored after ingest; the same index always gives the same article."""
+    rng = random.Random(index)
+    now = time.time() if now is None else now
+    category = CATEGORIES[index % len(CATEGORIES)]
+    title = f"{_sentence(rng, 9)[:-1]} ({index})"
+    url = f"https://news{index % 50}.example.com/{category}/{index}"
+    body = [' '.join(_sentence(rng, rng.randint(8, 16)) for _ in range(4)) for _ in range(paragraphs)]
+    published_ts = now - index * 60
+    categories = [category]
+    if index % 3 == 0:
+        # Some articles also match a second category by keywords
+        categories.append(CATEGORIES[(index + 3) % len(CATEGORIES)])
+    return {
+        'id': make_article_id(url),
+        'title': title,
+        'url': url,
+        'source': f"Source {index % 50}",
+        'category': category,
+        'categories': categories,
+        'published': formatdate(published_ts),
+        'published_ts': published_ts,
+        'summary': body[0][:300],
+        'full_content': ''.join(f'<p>{html.escape(p)}</p>' for p in body),
+        'text': '\n'.join(body),
+        'content_html': ''.join(f'<p>{html.escape(p)}</p>' for p in body),
+        'paragraphs': body,
+        'keywords': sorted({rng.choice(WORDS) for _ in range(5)}),
+        'image': f"https://img.example.com/{index}.jpg" if index % 2 else '',
+        'images': []
+    }
+
+
+def make_corpus(size: int, now: float = None) -> List[Dict[str, Any]]:
+    """`size` distinct articles, newest first."""
+    now = time.time() if now is None else now
+    return sorted((make_article(index, now) for index in range(size)), key=time_order_key)
+
+
+def make_feed(base_url: str, feed: int, entries: int = 10, now: float = None) -> bytes:
+    """An RSS document whose entries link to article pages on the replay server."""
+    rng = random.Random(f"feed-{feed}")
+    now = time.time() if now is None else now
+    items = []
+    for entry in range(entries):
+        key = f"{feed}-{entry}"
+        items.append(
+            f"<item><title>{html.escape(_sentence(rng, 9)[:-1])} ({key})</title>"
+            f"<link>{base_url}/article/{key}.html</link>"
+            f"<guid>{base_url}/article/{key}.html</guid>"
+            f"<description>{html.escape(_sentence(rng, 25))}</description>"
+            f"<pubDate>{formatdate(now - (feed * entries + entry) * 60)}</pubDate></item>")
+    return (f'<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel>'
+            f'<title>Feed {feed}</title><link>{base_url}/</link><description>Synthetic feed</description>'
+            f'{"".join(items)}</channel></rss>').encode('utf-8')
+
+
+def make_article_page(key: str, paragraphs: int = 8) -> bytes:
+    """An article page that newspaper can extract, including markup the sanitizer must remove."""
+    rng = random.Random(f"page-{key}")
+    title = _sentence(rng, 9)[:-1]
+    body = ''.join(f"<p>{' '.join(_sentence(rng, rng.randint(8, 16)) for _ in range(4))}</p>"
+                   for _ in range(paragraphs))
+    return (f'<html><head><title>{title}</title><meta name="author" content="Staff Writer"></head><body>'
+            f'<nav><a href="/">Home</a></nav><article><h1>{title}</h1><script>track();</script>{body}'
+            f'<iframe src="https://ads.example.com/"></iframe></article><footer>Footer</footer></body></html>'
+            ).encode('utf-8')
@@ -0,0 +1,81 @@
+import bisect
+import re
+from collections import Counter
+from typing import Dict, Iterable, List
+
+# Category keywords for improved detection
+CATEGORY_KEYWORDS = {
+    'world': ['world', 'international', 'global', 'foreign', 'europe', 'asia', 'africa', 'middle east', 'politics', 'diplomat', 'nation'],
+    'business': ['business', 'economy', 'finance', 'market', 'stock', 'trade', 'economic', 'investment', 'startup', 'entrepreneur'],
+    'technology': ['tech', 'technology', 'digital', 'software', 'hardware', 'app', 'ai', 'artificial intelligence', 'robot', 'computing', 'cyber'],
+    'science': ['science', 'research', 'discovery', 'space', 'physics', 'biology', 'chemistry', 'environment', 'climate', 'nature'],
+    'health': ['health', 'medical', 'medicine', 'disease', 'virus', 'pandemic', 'doctor', 'hospital', 'wellness', 'mental health'],
+    'sports': ['sport', 'football', 'soccer', 'basketball', 'baseball', 'tennis', 'golf', 'hockey', 'olympics', 'athlete'],
+    'entertainment': ['entertainment', 'art', 'film', 'movie', 'music', 'celebrity', 'culture', 'book', 'tv', 'television', 'theater']
+}
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """Regex alternation of the keywords factored into a prefix tree, which re matches much faster."""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: dict) -> str:
+        branches = [(r'\s+' if char == ' ' else re.escape(char)) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+
+# Category of every keyword (lowercase, single-spaced)
+KEYWORD_CATEGORIES: Dict[str, List[str]] = {}
+for _category, _keywords in CATEGORY_KEYWORDS.items():
+    for _keyword in _keywords:
+        KEYWORD_CATEGORIES.setdefault(_keyword, []).append(_category)
+
+# Every keyword as a whole word or phrase, optionally plural, in one pattern over
+# lowercased text: "ai" and "art" no longer match inside "said" or "article"
+KEYWORD_PATTERN = re.compile(r'(?<![a-z0-9])(' + _trie_pattern(KEYWORD_CATEGORIES) + r')(?:e?s)?(?![a-z0-9])')
+
+# Separates texts scanned together by score_batch(); no keyword can match across it
+_SEPARATOR = '\x00'
+
+
+def score_batch(texts: Iterable[str]) -> List[Dict[str, int]]:
+    """Keyword hits per category for each text, found in a single scan over all of them."""
+    # Lowercased before the offsets are taken, as lower() can lengthen a string ('İ' becomes two characters)
+    texts = [(text or '').lower() for text in texts]
+    starts = []
+    offset = 0
+    for text in texts:
+        starts.append(offset)
+        offset += len(text) + len(_SEPARATOR)
+    scores = [Counter() for _ in texts]
+    for match in KEYWORD_PATTERN.finditer(_SEPARATOR.join(texts)):
+        keyword = ' '.join(match.group(1).split())
+        scores[bisect.bisect_right(starts, match.start()) - 1].update(KEYWORD_CATEGORIES[keyword])
+    return scores
+
+
+def score_categories(text: str) -> Dict[str, int]:
+    """Keyword hits per category in the text."""
+    return score_batch([text])[0]
+
+
+def rank_categories(scores: Dict[str, int]) -> List[str]:
+    """Categories with at least one hit, highest score first; ties keep CATEGORY_KEYWORDS order."""
+    return sorted((category for category in CATEGORY_KEYWORDS if scores.get(category)),
+                  key=lambda category: -scores[category])
+
+
+def match_categories(text: str) -> List[str]:
+    """Categories with at least one keyword in the text, highest score first."""
+    return rank_categories(score_categories(text))
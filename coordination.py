@@ -0,0 +1,71 @@
+import logging
+import os
+import threading
+import time
+
+# File locks are only available on POSIX; elsewhere every process refreshes on its own
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshLeader:
+    """Elects the one process that crawls for a shared article database.
+
+    Every process (e.g. each gunicorn worker) tries to take an exclusive,
+    non-blocking flock on the same lock file. The process that gets it
+    crawls and publishes. The others only read the database, picking up
+    each new generation. The lock is held for the life of the process, and
+    the operating system releases it when the process exits, so another
+    worker takes over at its next attempt.
+    """
+
+    def __init__(self, lock_path: str, retry_interval: float = 5):
+        """
+        Args:
+            lock_path: Lock file shared by all processes using the same database
+            retry_interval: Seconds between attempts to take over while another process leads
+        """
+        self.lock_path = lock_path
+        self.retry_interval = retry_interval
+        self._file = None
+        self._next_attempt = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """Become the leader if no other process is; True if this process is the leader."""
+        if fcntl is None:
+            return True
+        with self._lock:
+            if self._file is not None:
+                return True
+            if time.monotonic() < self._next_attempt:
+                return False
+            self._next_attempt = time.monotonic() + self.retry_interval
+            lock_file = open(self.lock_path, 'a+')
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+            lock_file.seek(0)
+            lock_file.truncate()
+            lock_file.write(str(os.getpid()))
+            lock_file.flush()
+            self._file = lock_file
+            logger.info(f"Process {os.getpid()} is now refreshing articles for {self.lock_path}")
+            return True
+
+    def is_leader(self) -> bool:
+        return fcntl is None or self._file is not None
+
+    def release(self):
+        """Give up leadership so another process can take over."""
+        with self._lock:
+            if self._file is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+                self._file.close()
+                self._file = None
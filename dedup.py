@@ -0,0 +1,144 @@
+import hashlib
+import random
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from article_store import normalize_url
+
+# Words that carry no meaning for telling stories apart
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'have', 'how', 'in',
+    'is', 'it', 'its', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'what', 'who',
+    'why', 'will', 'with'
+}
+
+# Trailing " - Outlet Name" that Google News and some feeds append to headlines
+OUTLET_SUFFIX_RE = re.compile(r'\s+[-–—|]\s+[^-–—|]{1,40}$')
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def title_tokens(title: str) -> Set[str]:
+    """Normalized word set of a headline, without outlet suffix and stopwords."""
+    title = OUTLET_SUFFIX_RE.sub('', title.strip()).lower()
+    return {token for token in TOKEN_RE.findall(title) if token not in STOPWORDS}
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class NearDuplicateIndex:
+    """Detects near-duplicate articles in roughly constant time per article.
+
+    Titles are reduced to normalized word sets and summarized with MinHash
+    signatures. Signatures are split into bands and bucketed (LSH), so a new
+    title is only compared against the few earlier titles that share a bucket.
+    Candidates are confirmed by Jaccard similarity, or by containment for a
+    short headline repeated inside a longer one. Articles with the same
+    canonical URL are always duplicates.
+    """
+
+    def __init__(self, num_perm: int = 48, bands: int = 16, threshold: float = 0.6,
+                 containment: float = 0.9, min_tokens: int = 4, seed: int = 1):
+        """
+        Args:
+            num_perm: MinHash signature length; must be divisible by bands
+            bands: Number of LSH bands; more bands find more candidates
+            threshold: Jaccard similarity at which two titles are duplicates
+            containment: Share of the shorter title's words that must appear in
+                the longer one for it to count as a duplicate
+            min_tokens: Titles with fewer words are only matched by URL
+        """
+        if num_perm % bands:
+            raise ValueError('num_perm must be divisible by bands')
+        self.rows = num_perm // bands
+        self.bands = bands
+        self.threshold = threshold
+        self.containment = containment
+        self.min_tokens = min_tokens
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+                       for _ in range(num_perm)]
+        self._buckets: List[Dict[tuple, List[str]]] = [defaultdict(list) for _ in range(bands)]
+        self._tokens: Dict[str, Set[str]] = {}
+        self._urls: Dict[str, str] = {}
+        self._key_urls: Dict[str, str] = {}  # key -> canonical URL, for removal
+        self._keys: Set[str] = set()
+
+    def _signature(self, tokens: Set[str]) -> List[int]:
+        hashes = [_token_hash(token) for token in tokens]
+        return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self._perms]
+
+    def _band_keys(self, signature: List[int]):
+        for band in range(self.bands):
+            yield band, tuple(signature[band * self.rows:(band + 1) * self.rows])
+
+    def _is_similar(self, tokens: Set[str], other: Set[str]) -> bool:
+        overlap = len(tokens & other)
+        if overlap / len(tokens | other) >= self.threshold:
+            return True
+        return overlap / min(len(tokens), len(other)) >= self.containment
+
+    def add(self, key: str, title: str, url: str = '') -> Optional[str]:
+        """Add an article unless it duplicates one already in the index.
+
+        Returns:
+            The key of the earlier duplicate, or None if the article was added.
+        """
+        canonical_url = normalize_url(url) if url else None
+        if canonical_url and canonical_url in self._urls:
+            return self._urls[canonical_url]
+
+        tokens = title_tokens(title)
+        band_keys = []
+        if len(tokens) >= self.min_tokens:
+            band_keys = list(self._band_keys(self._signature(tokens)))
+            checked = set()
+            for band, band_key in band_keys:
+                for candidate in self._buckets[band].get(band_key, ()):
+                    if candidate in checked:
+                        continue
+                    checked.add(candidate)
+                    if self._is_similar(tokens, self._tokens[candidate]):
+                        return candidate
+
+        self._keys.add(key)
+        if canonical_url:
+            self._urls[canonical_url] = key
+            self._key_urls[key] = canonical_url
+        if band_keys:
+            self._tokens[key] = tokens
+            for band, band_key in band_keys:
+                self._buckets[band][band_key].append(key)
+        return None
+
+    def remove(self, key: str):
+        """Forget an article, e.g. once it has left the corpus."""
+        if key not in self._keys:
+            return
+        self._keys.discard(key)
+        canonical_url = self._key_urls.pop(key, None)
+        if canonical_url is not None and self._urls.get(canonical_url) == key:
+            del self._urls[canonical_url]
+        tokens = self._tokens.pop(key, None)
+        if tokens is not None:
+            # Signatures are not kept, so recompute the buckets the key was filed under
+            for band, band_key in self._band_keys(self._signature(tokens)):
+                bucket = self._buckets[band].get(band_key)
+                if bucket is not None and key in bucket:
+                    bucket.remove(key)
+                    if not bucket:
+                        del self._buckets[band][band_key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def keys(self) -> Set[str]:
+        """Keys of every article in the index."""
+        return set(self._keys)
@@ -0,0 +1,195 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, Optional
+
+from newspaper import Article
+from newspaper.article import ArticleDownloadState
+
+from metrics import REGISTRY
+from sanitize import prepare_content
+
+logger = logging.getLogger(__name__)
+
+NLP_MODES = ('inline', 'deferred', 'lazy', 'skip')
+
+# Worker results carry their stage timings under this key back to the parent process
+TIMINGS_KEY = '_timings'
+
+# Workers are started from a fork server (or spawned where there is none) rather than
+# forked from the server process: forking while other threads hold locks (logging,
+# sqlite, HTTP pools) can leave the children deadlocked
+MP_CONTEXT = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+
+STAGE_SECONDS = REGISTRY.histogram('news_stage_seconds', 'Seconds spent in each refresh stage', ['stage'])
+
+
+def extract_html(url: str, html: str, run_nlp: bool = True) -> Dict[str, Any]:
+    """Parse a downloaded article page with newspaper.
+
+    Runs in an extraction worker process, so it only takes and returns plain data.
+    """
+    timings = {}
+    started = time.perf_counter()
+    article = Article(url)
+    article.download(input_html=html)
+    article.parse()
+    timings['parse'] = time.perf_counter() - started
+
+    extracted = {
+        # Try to extract the full HTML content
+        'full_content': article.article_html or '',
+        'text': article.text,
+        # Get main image
+        'image': article.top_image,
+        # Get all images - ensure it's a list, not a set
+        'images': list(article.images) if article.images else [],
+        # Try to get authors
+        'authors': list(article.authors) if article.authors else []
+    }
+    # Sanitize once here, in the worker, rather than on every article view
+    started = time.perf_counter()
+    extracted.update(prepare_content(extracted['full_content'], extracted['text']))
+    timings['sanitize'] = time.perf_counter() - started
+
+    # Get additional metadata
+    if run_nlp:
+        started = time.perf_counter()
+        try:
+            extracted.update(_nlp(article))
+        except Exception:
+            pass
+        timings['nlp'] = time.perf_counter() - started
+
+    extracted[TIMINGS_KEY] = timings
+    return extracted
+
+
+def extract_nlp(url: str, title: str, text: str) -> Dict[str, Any]:
+    """Keywords and summary for text that was extracted earlier without NLP."""
+    article = Article(url)
+    article.title = title
+    article.text = text
+    # nlp() only needs the title and text, so skip downloading and parsing again
+    article.download_state = ArticleDownloadState.SUCCESS
+    article.is_parsed = True
+    started = time.perf_counter()
+    result = _nlp(article)
+    result[TIMINGS_KEY] = {'nlp': time.perf_counter() - started}
+    return result
+
+
+def _nlp(article: Article) -> Dict[str, Any]:
+    article.nlp()
+    return {
+        'keywords': list(article.keywords) if article.keywords else [],
+        'summary': article.summary
+    }
+
+
+def _record_timings(inner: Future) -> Future:
+    """A future for inner's result that only resolves once its stage timings were recorded and removed."""
+    outer = Future()
+
+    def done(future: Future):
+        try:
+            result = future.result()
+        except BaseException as e:
+            outer.set_exception(e)
+            return
+        for stage, seconds in result.pop(TIMINGS_KEY, {}).items():
+            STAGE_SECONDS.observe(seconds, stage=stage)
+        outer.set_result(result)
+
+    inner.add_done_callback(done)
+    return outer
+
+
+def _completed(fn, *args) -> Future:
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+class ArticleExtractor:
+    """CPU-bound stage of a refresh: parses article pages and runs NLP on a process pool.
+
+    Fetch threads download pages and hand the HTML over with submit(), which
+    returns immediately so they can move on to the next download. At most
+    max_pending pages wait for a worker; beyond that submit() blocks, which
+    keeps memory bounded when parsing falls behind the network. NLP jobs
+    (submit_nlp()) are queued apart from pages, so a crawl that fills the
+    page queue does not hold up keyword extraction for an article view.
+
+    nlp_mode controls keyword extraction and summarization:
+        'inline'    during extraction (default)
+        'deferred'  after the refresh has been published (see submit_nlp())
+        'lazy'      when an article is first opened (see NewsFeed.enrich_article())
+        'skip'      never
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None, nlp_mode: str = 'inline'):
+        """
+        Args:
+            workers: Extraction processes (defaults to the CPU count); 0 parses
+                on the calling thread
+            max_pending: Pages, and separately NLP jobs, allowed to queue for a worker
+                (defaults to 4 per worker)
+            nlp_mode: 'inline', 'deferred', 'lazy' or 'skip'
+        """
+        if nlp_mode not in NLP_MODES:
+            raise ValueError(f"nlp_mode must be one of {', '.join(NLP_MODES)}")
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.nlp_mode = nlp_mode
+        self._pending = threading.BoundedSemaphore(max_pending or max(self.workers, 1) * 4)
+        self._nlp_pending = threading.BoundedSemaphore(max_pending or max(self.workers, 1) * 4)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=MP_CONTEXT)
+            return self._pool
+
+    def _submit(self, pending: threading.BoundedSemaphore, timeout: Optional[float], fn, *args) -> Future:
+        if self.workers == 0:
+            return _record_timings(_completed(fn, *args))
+        # Wait for room in the queue, then free the slot once a worker is done
+        if not pending.acquire(timeout=timeout):
+            raise TimeoutError('Extraction queue is full')
+        try:
+            future = self._get_pool().submit(fn, *args)
+        except Exception:
+            pending.release()
+            raise
+        future.add_done_callback(lambda _: pending.release())
+        return _record_timings(future)
+
+    def submit(self, url: str, html: str) -> Future:
+        """Queue a downloaded page for extraction; the future resolves to the extracted fields."""
+        return self._submit(self._pending, None, extract_html, url, html, self.nlp_mode == 'inline')
+
+    def submit_nlp(self, url: str, title: str, text: str, timeout: Optional[float] = None) -> Future:
+        """Queue keyword extraction and summarization for already extracted text.
+
+        Args:
+            timeout: Seconds to wait for room in the NLP queue (forever if None)
+
+        Raises:
+            TimeoutError: If the queue stayed full for `timeout` seconds
+        """
+        return self._submit(self._nlp_pending, timeout, extract_nlp, url, title, text)
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
@@ -0,0 +1,79 @@
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from article_store import make_article_id, normalize_url
+from storage import ArticleDatabase
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionCache:
+    """Cache of article extraction results in the article database, keyed by normalized URL.
+
+    Holds what newspaper extracted from an article page (text, HTML, images,
+    authors, keywords) so that a refresh only downloads and parses stories it
+    has not seen before. Entries expire after `ttl` seconds, and prune()
+    evicts the least recently used ones beyond `max_entries`. Once an article
+    is stored, its entry shares the article's body rather than keeping a
+    copy (see ArticleDatabase).
+
+    len() is a running count kept by put() and prune(), so it never queries
+    the database. It is 0 until this process first prunes the cache, which
+    only the process that crawls does.
+    """
+
+    def __init__(self, db: ArticleDatabase, ttl: float = 86400, max_entries: int = 5000):
+        """
+        Args:
+            db: Article database the cache is kept in
+            ttl: Seconds an extraction is reused
+            max_entries: Extractions kept by prune()
+        """
+        self.db = db
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = None  # entries as of the last prune() plus those added since
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return the cached extraction for a URL, or None if missing or expired."""
+        try:
+            return self.db.get_extraction(normalize_url(url), time.time() - self.ttl)
+        except sqlite3.Error as e:
+            logger.error(f"Error reading extraction cache: {e}")
+            return None
+
+    def put(self, url: str, data: Dict[str, Any]):
+        """Store the extraction result for a URL."""
+        try:
+            new = self.db.put_extraction(normalize_url(url), make_article_id(url), data)
+        except sqlite3.Error as e:
+            logger.error(f"Error writing extraction cache: {e}")
+            return
+        if new:
+            with self._lock:
+                if self._entries is not None:
+                    self._entries += 1
+
+    def update(self, url: str, fields: Dict[str, Any]):
+        """Add fields, such as keywords, to a cached extraction without changing its age."""
+        try:
+            self.db.update_extraction(normalize_url(url), fields)
+        except sqlite3.Error as e:
+            logger.error(f"Error writing extraction cache: {e}")
+
+    def prune(self):
+        """Drop expired extractions and the least recently used ones beyond max_entries."""
+        try:
+            entries = self.db.prune_extractions(time.time() - self.ttl, self.max_entries)
+        except sqlite3.Error as e:
+            logger.error(f"Error pruning extraction cache: {e}")
+            return
+        with self._lock:
+            self._entries = entries
+
+    def __len__(self) -> int:
+        return self._entries or 0
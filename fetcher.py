@@ -0,0 +1,134 @@
+import logging
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+class FetchResult(NamedTuple):
+    """Outcome of fetching a single source."""
+    source: Any
+    articles: List[Dict[str, Any]]
+    error: Optional[str]
+    elapsed: float
+    skipped: bool = False  # never started before the refresh deadline
+
+
+class ConcurrentFetcher:
+    """Fetches news sources in parallel on a thread pool.
+
+    Concurrency is capped globally (max_workers) and per feed host
+    (per_host_limit). Each source gets source_timeout seconds once it starts
+    running and the whole refresh must finish within refresh_deadline seconds;
+    sources that overrun are abandoned so they never hold back the others.
+    Sources still waiting for a worker at the deadline are reported as
+    skipped, since they were never tried.
+    """
+
+    def __init__(self, max_workers: int = 16, per_host_limit: int = 2,
+                 source_timeout: float = 30, refresh_deadline: float = 120):
+        self.max_workers = max(1, max_workers)
+        self.per_host_limit = max(1, per_host_limit)
+        self.source_timeout = source_timeout
+        self.refresh_deadline = refresh_deadline
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    def fetch(self, sources: List[Any],
+              fetch_fn: Callable[[Any, float], List[Dict[str, Any]]]) -> Iterator[FetchResult]:
+        """Fetch sources concurrently, yielding a FetchResult as each one finishes.
+
+        Args:
+            sources: Sources to fetch; each must have a `url` attribute
+            fetch_fn: Called as fetch_fn(source, deadline) on a worker thread, where
+                deadline is a time.monotonic() value the source should stop by
+        """
+        if not sources:
+            return
+
+        refresh_deadline = time.monotonic() + self.refresh_deadline
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='news-fetch')
+        pending = list(sources)
+        running = {}  # future -> (source, host)
+        abandoned = set()  # futures we gave up on that still occupy a thread
+        started = {}  # id(source) -> time.monotonic() when a worker picked it up
+        host_active = defaultdict(int)
+
+        def run(source):
+            # Timeouts count from when a worker actually starts the source, not
+            # from submission, so queueing behind abandoned work is not penalised.
+            start = started[id(source)] = time.monotonic()
+            deadline = min(start + self.source_timeout, refresh_deadline)
+            return fetch_fn(source, deadline)
+
+        def dispatch():
+            for source in list(pending):
+                if len(running) + len(abandoned) >= self.max_workers:
+                    break
+                host = self._host(source.url)
+                if host_active[host] >= self.per_host_limit:
+                    continue
+                pending.remove(source)
+                host_active[host] += 1
+                running[executor.submit(run, source)] = (source, host)
+
+        def release(future):
+            source, host = running.pop(future)
+            host_active[host] -= 1
+            return source
+
+        try:
+            dispatch()
+            while running or pending:
+                now = time.monotonic()
+                if now >= refresh_deadline:
+                    for future in list(running):
+                        source = release(future)
+                        logger.warning(f"Refresh deadline reached, abandoning {source.name}")
+                        yield FetchResult(source, [], 'refresh deadline exceeded', now - started.get(id(source), now))
+                    for source in pending:
+                        logger.warning(f"Refresh deadline reached, skipping {source.name}")
+                        yield FetchResult(source, [], 'refresh deadline exceeded', 0.0, skipped=True)
+                    pending.clear()
+                    break
+
+                # Wake up for whichever comes first: the refresh deadline or the
+                # earliest per-source timeout among running sources.
+                timeout = refresh_deadline - now
+                for source, _ in running.values():
+                    start = started.get(id(source))
+                    if start is not None:
+                        timeout = min(timeout, start + self.source_timeout - now)
+                watched = set(running) | abandoned
+                done, _ = wait(watched, timeout=max(timeout, 0.01), return_when=FIRST_COMPLETED)
+
+                abandoned -= done
+                now = time.monotonic()
+                for future in done:
+                    if future not in running:
+                        continue
+                    source = release(future)
+                    elapsed = now - started.get(id(source), now)
+                    try:
+                        articles = future.result()
+                    except Exception as e:
+                        yield FetchResult(source, [], str(e), elapsed)
+                    else:
+                        yield FetchResult(source, articles or [], None, elapsed)
+
+                for future, (source, _) in list(running.items()):
+                    start = started.get(id(source))
+                    if start is not None and now - start >= self.source_timeout:
+                        release(future)
+                        abandoned.add(future)
+                        logger.warning(f"Timed out fetching {source.name} after {self.source_timeout}s")
+                        yield FetchResult(source, [], 'source timeout exceeded', now - start)
+
+                dispatch()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
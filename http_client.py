@@ -0,0 +1,78 @@
+import logging
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Brotli is only advertised when a decoder is installed (pip install brotli)
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = 'gzip, deflate, br'
+    except ImportError:
+        ACCEPT_ENCODING = 'gzip, deflate'
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (compatible; DailyDigest/1.0; +https://github.com/code-sauce/newspaper)'
+
+
+class HttpClient:
+    """Shared HTTP session for feed and article downloads.
+
+    Connections are pooled per host and kept alive between requests, so
+    stories from the same outlet reuse one TLS connection. Idempotent
+    requests are retried with exponential backoff on connection errors and
+    429/5xx responses.
+    """
+
+    def __init__(self, timeout: float = 10, retries: int = 2, backoff_factor: float = 0.5,
+                 pool_connections: int = 100, pool_maxsize: int = 4,
+                 user_agent: str = DEFAULT_USER_AGENT):
+        """
+        Args:
+            timeout: Default connect/read timeout in seconds
+            retries: Retries per request on connection errors and 429/5xx responses
+            backoff_factor: Base of the exponential backoff between retries
+            pool_connections: Number of hosts to keep connection pools for
+            pool_maxsize: Connections kept alive per host
+            user_agent: User-Agent header sent with every request
+        """
+        self.timeout = timeout
+        retry = Retry(total=retries, connect=retries, read=retries, status=retries,
+                      backoff_factor=backoff_factor,
+                      status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=frozenset(['GET', 'HEAD']),
+                      respect_retry_after_header=True,
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'User-Agent': user_agent,
+            'Accept-Encoding': ACCEPT_ENCODING
+        })
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None,
+            timeout: Optional[float] = None) -> requests.Response:
+        """GET a URL through the shared session."""
+        return self.session.get(url, headers=headers, timeout=timeout or self.timeout)
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> HttpClient:
+    """Process-wide client used when no client is passed in explicitly."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
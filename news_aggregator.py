@@ -1,30 +1,50 @@
 import feedparser
 import requests
 from bs4 import BeautifulSoup
-from newspaper import Article, ArticleException
-import os
+from newspaper import ArticleException, network
 import time
-import json
 import random
+import calendar
+import threading
+from concurrent.futures import Future
+from collections import Counter
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Set, Tuple
 import logging
 import re
+from fetcher import ConcurrentFetcher
+from article_store import (ArticleStore, ArticleSnapshot, decode_cursor, encode_cursor, make_article_id,
+                           parse_timestamp, time_order_key)
+from extraction_cache import ExtractionCache
+from http_client import HttpClient, get_default_client
+from dedup import NearDuplicateIndex
+from categories import CATEGORY_KEYWORDS, rank_categories, score_batch  # CATEGORY_KEYWORDS re-exported for callers
+from search_index import SearchIndex
+from extraction import ArticleExtractor
+from sanitize import prepare_content
+from source_scheduler import FeedHints, SourceScheduler, parse_feed_hints
+from source_health import SourceHealth
+from metrics import REGISTRY
+from coordination import RefreshLeader
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Category keywords for improved detection
-CATEGORY_KEYWORDS = {
-    'world': ['world', 'international', 'global', 'foreign', 'europe', 'asia', 'africa', 'middle east', 'politics', 'diplomat', 'nation'],
-    'business': ['business', 'economy', 'finance', 'market', 'stock', 'trade', 'economic', 'investment', 'startup', 'entrepreneur'],
-    'technology': ['tech', 'technology', 'digital', 'software', 'hardware', 'app', 'ai', 'artificial intelligence', 'robot', 'computing', 'cyber'],
-    'science': ['science', 'research', 'discovery', 'space', 'physics', 'biology', 'chemistry', 'environment', 'climate', 'nature'],
-    'health': ['health', 'medical', 'medicine', 'disease', 'virus', 'pandemic', 'doctor', 'hospital', 'wellness', 'mental health'],
-    'sports': ['sport', 'football', 'soccer', 'basketball', 'baseball', 'tennis', 'golf', 'hockey', 'olympics', 'athlete'],
-    'entertainment': ['entertainment', 'art', 'film', 'movie', 'music', 'celebrity', 'culture', 'book', 'tv', 'television', 'theater']
-}
+# Used when a source is fetched without an extractor: parses on the fetching thread
+INLINE_EXTRACTOR = ArticleExtractor(workers=0)
+
+STAGE_SECONDS = REGISTRY.histogram('news_stage_seconds', 'Seconds spent in each refresh stage', ['stage'])
+SOURCE_STAGE_SECONDS = REGISTRY.histogram('news_source_stage_seconds',
+                                          'Seconds spent downloading and parsing feeds and articles, per source',
+                                          ['source', 'stage'])
+SOURCE_FETCH_SECONDS = REGISTRY.histogram('news_source_fetch_seconds', 'Seconds to fetch a source', ['source'])
+SOURCE_FETCHES = REGISTRY.counter('news_source_fetches_total', 'Source fetches by outcome', ['source', 'status'])
+SOURCE_ARTICLES = REGISTRY.counter('news_source_articles_total', 'Articles returned by each source', ['source'])
+REFRESH_SECONDS = REGISTRY.histogram('news_refresh_seconds', 'Seconds per refresh', [],
+                                     buckets=(1, 5, 10, 30, 60, 120, 300, 600))
+EXTRACTION_CACHE = REGISTRY.counter('news_extraction_cache_total', 'Extraction cache lookups', ['result'])
+SNAPSHOT_READS = REGISTRY.counter('news_snapshot_reads_total', 'Snapshot reads by freshness', ['state'])
 
 class NewsSource:
     """Represents a news source with an RSS feed or API."""
@@ -34,27 +54,98 @@ class NewsSource:
         self.url = url
         self.source_type = source_type  # 'rss', 'api', etc.
         self.category = category.lower()  # world, tech, science, etc.
+        # Validators from the last complete fetch, sent back as a conditional GET
+        self.etag = None
+        self.modified = None
+        self.last_fetch_status = None  # 'ok', 'unchanged' or 'error'
+        self.last_error = None
+        self._last_articles = []
+        # What the last fetch saw, for the scheduler
+        self.feed_hints = FeedHints()
+        self.last_entry_count = 0  # entries in the feed (0 if it was not modified)
+        self.last_new_entries = 0  # entries that were not in the feed at the previous fetch
+        self._entry_ids = set()
     
-    def fetch_articles(self) -> List[Dict[str, Any]]:
-        """Fetch articles from the source."""
+    def fetch_articles(self, deadline: Optional[float] = None,
+                       extraction_cache: Optional[ExtractionCache] = None,
+                       http_client: Optional[HttpClient] = None,
+                       extractor: Optional[ArticleExtractor] = None) -> List[Dict[str, Any]]:
+        """Fetch articles from the source.
+        
+        Args:
+            deadline: Optional time.monotonic() value after which no more
+                article pages are downloaded
+            extraction_cache: Optional cache of earlier extractions; only
+                article URLs missing from it are downloaded and parsed
+            http_client: Pooled client for feed and article requests
+                (defaults to the process-wide client)
+            extractor: Parses downloaded pages (defaults to parsing on this thread)
+        """
         if self.source_type == 'rss':
-            return self._fetch_from_rss()
+            return self._fetch_from_rss(deadline, extraction_cache, http_client or get_default_client(),
+                                        extractor or INLINE_EXTRACTOR)
         else:
             # Placeholder for other source types
             return []
     
-    def _fetch_from_rss(self) -> List[Dict[str, Any]]:
-        """Fetch articles from RSS feed."""
+    def _fetch_from_rss(self, deadline: Optional[float] = None,
+                        extraction_cache: Optional[ExtractionCache] = None,
+                        http_client: Optional[HttpClient] = None,
+                        extractor: Optional[ArticleExtractor] = None) -> List[Dict[str, Any]]:
+        """Fetch articles from RSS feed.
+        
+        The feed is requested with the ETag and Last-Modified values of the
+        previous fetch; if the server answers 304 Not Modified, the articles
+        parsed last time are returned without downloading anything.
+        """
         articles = []
+        complete = True
         try:
-            feed = feedparser.parse(self.url)
+            http_client = http_client or get_default_client()
+            extractor = extractor or INLINE_EXTRACTOR
+            headers = {}
+            if self.etag:
+                headers['If-None-Match'] = self.etag
+            if self.modified:
+                headers['If-Modified-Since'] = self.modified
+            with SOURCE_STAGE_SECONDS.time(source=self.name, stage='feed_download'):
+                response = http_client.get(self.url, headers=headers,
+                                           timeout=self._request_timeout(http_client, deadline))
+            if response.status_code == 304:
+                self.last_fetch_status = 'unchanged'
+                self.last_entry_count = self.last_new_entries = 0
+                return list(self._last_articles)
+            response.raise_for_status()
+            
+            with SOURCE_STAGE_SECONDS.time(source=self.name, stage='feed_parse'):
+                feed = feedparser.parse(response.content,
+                                        response_headers={k.lower(): v for k, v in response.headers.items()})
+            if feed.get('bozo') and not feed.entries:
+                raise feed.get('bozo_exception') or ValueError('Feed could not be parsed')
+            self.feed_hints = parse_feed_hints(response.content)
+            entry_ids = {entry.get('id') or entry.get('link') or entry.get('title') for entry in feed.entries}
+            self.last_entry_count = len(entry_ids)
+            self.last_new_entries = len(entry_ids - self._entry_ids)
+            self._entry_ids = entry_ids
+            
+            # Pages are downloaded here and parsed by the extractor, so the next
+            # download overlaps with parsing the previous page
+            pending = []  # (article_data, future of the extraction or None)
             for entry in feed.entries[:10]:  # Limit to 10 articles per source
+                if deadline is not None and time.monotonic() >= deadline:
+                    logger.warning(f"Source timeout reached for {self.name}, keeping {len(pending)} articles")
+                    complete = False
+                    break
+                
+                link = entry.get('link', '')
                 article_data = {
+                    'id': make_article_id(link, f"{self.name}:{entry.get('title', '')}"),
                     'title': entry.get('title', 'No title'),
-                    'url': entry.get('link', ''),
+                    'url': link,
                     'source': self.name,
                     'category': self.category,
                     'published': entry.get('published', datetime.now().strftime('%Y-%m-%d %H:%M:%S')),
+                    'published_ts': self._published_ts(entry),
                     'summary': entry.get('summary', ''),
                     'full_content': '',
                     'text': '',
@@ -62,85 +153,150 @@ class NewsSource:
                     'images': []
                 }
                 
-                # Analyze title and summary for better category detection
-                article_data = self._enhance_article_category(article_data)
-                
-                # Try to get the full article content
+                # Try to get the full article content, reusing an earlier extraction of the same URL
+                future = None
                 try:
-                    article = Article(entry.get('link', ''))
-                    article.download()
-                    article.parse()
-                    
-                    # Try to extract the full HTML content
-                    article_data['full_content'] = article.article_html or ''
-                    article_data['text'] = article.text
-                    
-                    # Get main image
-                    article_data['image'] = article.top_image
-                    
-                    # Get all images - ensure it's a list, not a set
-                    article_data['images'] = list(article.images) if article.images else []
-                    
-                    # Try to get authors
-                    article_data['authors'] = list(article.authors) if article.authors else []
-                    
-                    # Get additional metadata
-                    try:
-                        article.nlp()
-                        article_data['keywords'] = list(article.keywords) if article.keywords else []
-                        article_data['summary'] = article.summary or article_data['summary']
-                        
-                        # Further enhance category using extracted keywords
-                        if article_data['keywords']:
-                            article_data = self._enhance_article_category(article_data, ' '.join(article_data['keywords']))
-                    except:
-                        pass
-                        
+                    extracted = extraction_cache.get(link) if extraction_cache is not None and link else None
+                    if extracted is not None:
+                        EXTRACTION_CACHE.inc(result='hit')
+                        article_data = self._apply_extraction(article_data, extracted)
+                    else:
+                        EXTRACTION_CACHE.inc(result='miss')
+                        with SOURCE_STAGE_SECONDS.time(source=self.name, stage='article_download'):
+                            html = self._download_article(link, http_client,
+                                                          self._request_timeout(http_client, deadline))
+                        future = extractor.submit(link, html)
                 except Exception as e:
-                    logger.warning(f"Error parsing article {entry.get('link', '')}: {e}")
-                    # If we failed to get full content, use the summary
-                    if not article_data['text']:
-                        article_data['text'] = article_data['summary']
-                    
-                    # Try to extract content from the summary if it's HTML
-                    if '<' in article_data['summary'] and '>' in article_data['summary']:
-                        try:
-                            soup = BeautifulSoup(article_data['summary'], 'html.parser')
-                            # Use the summary HTML as the full content
-                            article_data['full_content'] = article_data['summary']
-                            # Try to extract text if we don't have it
-                            if not article_data['text']:
-                                article_data['text'] = soup.get_text()
-                            # Try to find images
-                            for img in soup.find_all('img'):
-                                if img.get('src'):
-                                    article_data['images'].append(img['src'])
-                                    if not article_data['image']:
-                                        article_data['image'] = img['src']
-                        except Exception as e:
-                            logger.warning(f"Error parsing summary HTML: {e}")
-                
+                    logger.warning(f"Error downloading article {link}: {e}")
+                    self._apply_summary_fallback(article_data)
+                pending.append((article_data, future))
+            
+            for article_data, future in pending:
+                if future is not None:
+                    try:
+                        timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+                        extracted = future.result(timeout=timeout)
+                        if extraction_cache is not None:
+                            extraction_cache.put(article_data['url'], extracted)
+                        article_data = self._apply_extraction(article_data, extracted)
+                    except Exception as e:
+                        logger.warning(f"Error parsing article {article_data['url']}: {e or 'timed out'}")
+                        complete = False
+                        self._apply_summary_fallback(article_data)
+                if 'content_html' not in article_data:
+                    # Summary fallbacks and extractions cached before content was sanitized at ingest
+                    article_data.update(prepare_content(article_data['full_content'], article_data['text']))
                 articles.append(article_data)
+            articles = self._categorize(articles)
+            
+            # Only a fully processed feed may be reused for a later 304 response
+            self.etag = response.headers.get('ETag') if complete else None
+            self.modified = response.headers.get('Last-Modified') if complete else None
+            self._last_articles = articles
+            self.last_fetch_status = 'ok'
         except Exception as e:
             logger.error(f"Error fetching from {self.name}: {e}")
+            self.etag = self.modified = None
+            self.last_fetch_status = 'error'
+            self.last_error = str(e)
+        
+        return articles
+    
+    def _published_ts(self, entry: Dict[str, Any]) -> float:
+        """Publish time of a feed entry in epoch seconds, or now if the feed has none."""
+        # feedparser normalizes the dates it understands to UTC struct_time
+        parsed = entry.get('published_parsed') or entry.get('updated_parsed')
+        if parsed:
+            return float(calendar.timegm(parsed))
+        return parse_timestamp(entry.get('published') or entry.get('updated', '')) or time.time()
+    
+    def _request_timeout(self, http_client: HttpClient, deadline: Optional[float]) -> float:
+        """Request timeout that does not run past the source deadline."""
+        if deadline is None:
+            return http_client.timeout
+        return max(min(http_client.timeout, deadline - time.monotonic()), 1)
+    
+    def _download_article(self, url: str, http_client: HttpClient, timeout: float = None) -> str:
+        """Download an article page through the shared client."""
+        response = http_client.get(url, timeout=timeout)
+        response.raise_for_status()
+        # Let newspaper work out the page encoding as it would for its own downloads
+        return network.get_html_2XX_only(url, response=response)
+    
+    def _apply_summary_fallback(self, article_data: Dict[str, Any]):
+        """Fill in content from the feed summary when the article page could not be extracted."""
+        # If we failed to get full content, use the summary
+        if not article_data['text']:
+            article_data['text'] = article_data['summary']
+        
+        # Try to extract content from the summary if it's HTML
+        if '<' in article_data['summary'] and '>' in article_data['summary']:
+            try:
+                soup = BeautifulSoup(article_data['summary'], 'html.parser')
+                # Use the summary HTML as the full content
+                article_data['full_content'] = article_data['summary']
+                # Try to extract text if we don't have it
+                if not article_data['text']:
+                    article_data['text'] = soup.get_text()
+                # Try to find images
+                for img in soup.find_all('img'):
+                    if img.get('src'):
+                        article_data['images'].append(img['src'])
+                        if not article_data['image']:
+                            article_data['image'] = img['src']
+            except Exception as e:
+                logger.warning(f"Error parsing summary HTML: {e}")
+    
+    def _apply_extraction(self, article_data: Dict[str, Any], extracted: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy an extraction result onto the article built from the feed entry."""
+        for key in ('full_content', 'text', 'image', 'images', 'authors'):
+            article_data[key] = extracted[key]
+        if 'content_html' in extracted:
+            article_data['content_html'] = extracted['content_html']
+            article_data['paragraphs'] = extracted['paragraphs']
+        
+        if 'keywords' in extracted:
+            article_data['keywords'] = extracted['keywords']
+            article_data['summary'] = extracted.get('summary') or article_data['summary']
+        
+        return article_data
+    
+    def _categorize(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Work out the categories of a feed's articles once, at ingest.
+        
+        Stores every category an article belongs to in 'categories' (its own
+        category first, then matches by score), so category pages never have
+        to scan article text. All headlines and bodies are scored in one pass.
+        """
+        # Title, summary and extracted keywords decide the primary category
+        headline_scores = score_batch(' '.join([article_data['title'], article_data['summary']] +
+                                               article_data.get('keywords', []))
+                                      for article_data in articles)
+        body_scores = score_batch(article_data['text'] for article_data in articles)
         
+        for article_data, headline, body in zip(articles, headline_scores, body_scores):
+            headline_matches = rank_categories(headline)
+            self._enhance_article_category(article_data, headline_matches)
+            categories = [article_data['category']]
+            for category in headline_matches + rank_categories(body):
+                if category not in categories:
+                    categories.append(category)
+            article_data['categories'] = categories
         return articles
     
-    def _enhance_article_category(self, article_data: Dict[str, Any], additional_text: str = '') -> Dict[str, Any]:
-        """Analyze article content to potentially assign a more specific category."""
+    def _enhance_article_category(self, article_data: Dict[str, Any], matches: List[str]) -> Dict[str, Any]:
+        """Assign a more specific category to general articles.
+        
+        Args:
+            article_data: Article to update
+            matches: Categories whose keywords appear in the title, summary or
+                keywords, highest score first, as computed by _categorize
+        """
         if article_data['category'] != 'general':
             return article_data
-            
-        # Combine title and summary for analysis
-        content_to_analyze = article_data['title'] + ' ' + article_data['summary'] + ' ' + additional_text
-        content_to_analyze = content_to_analyze.lower()
         
-        # Check for category keywords
-        for category, keywords in CATEGORY_KEYWORDS.items():
-            for keyword in keywords:
-                if keyword in content_to_analyze:
-                    article_data['category'] = category
-                    return article_data
+        if matches:
+            article_data['category'] = matches[0]
         
         return article_data
 
@@ -160,12 +316,72 @@ class GoogleNewsSource(NewsSource):
 class NewsFeed:
     """Manages multiple news sources and aggregates their content."""
     
-    def __init__(self):
-        self.sources = self._initialize_sources()
-        self.cache_file = 'article_cache.json'
-        self.cache_duration = 3600  # Cache duration in seconds (1 hour)
+    def __init__(self, max_workers: int = 16, per_host_limit: int = 2,
+                 source_timeout: float = 30, refresh_deadline: float = 120,
+                 extraction_ttl: float = 86400, extraction_cache_size: int = 5000,
+                 http_client: Optional[HttpClient] = None,
+                 extraction_workers: Optional[int] = None, nlp_mode: str = 'inline',
+                 storage_path: str = 'articles.db', retention: float = 7 * 86400,
+                 poll_interval: float = 3600, min_poll_interval: float = 300,
+                 max_poll_interval: float = 6 * 3600, sources: Optional[List[NewsSource]] = None):
+        """
+        Args:
+            max_workers: Maximum number of sources fetched at the same time
+            per_host_limit: Maximum concurrent fetches against a single feed host
+            source_timeout: Seconds a single source may take before it is abandoned
+            refresh_deadline: Seconds the whole refresh may take
+            extraction_ttl: Seconds an extracted article is reused before it is downloaded again
+            extraction_cache_size: Maximum number of extracted articles kept on disk
+            http_client: Pooled HTTP client for feed and article downloads
+            extraction_workers: Processes that parse pages and run NLP (defaults
+                to the CPU count; 0 parses on the fetch threads)
+            nlp_mode: 'inline' runs keyword extraction and summarization while
+                parsing, 'deferred' runs it after a refresh is published, 'lazy'
+                runs it when an article is first opened (see enrich_article) and
+                'skip' turns it off
+            storage_path: SQLite database holding the article corpus
+            retention: Seconds an article is kept after it was last seen in a feed
+            poll_interval: Seconds between polls of a source until its update
+                frequency is known; also the age at which the corpus counts as stale
+            min_poll_interval: Shortest interval at which a source is polled
+            max_poll_interval: Longest interval at which a source is polled
+                (unless its feed asks for a longer one through ttl)
+            sources: Sources to aggregate (defaults to the built-in list)
+        """
+        self.sources = self._initialize_sources() if sources is None else sources
+        self.cache_file = 'article_cache.json'  # Imported into an empty database (older versions)
+        self.cache_duration = poll_interval  # Cache duration in seconds
+        self.scheduler = SourceScheduler(default_interval=poll_interval, min_interval=min_poll_interval,
+                                         max_interval=max_poll_interval)
+        self.health = SourceHealth()  # Circuit breakers that skip sources which keep failing
+        self.fetcher = ConcurrentFetcher(max_workers=max_workers,
+                                         per_host_limit=per_host_limit,
+                                         source_timeout=source_timeout,
+                                         refresh_deadline=refresh_deadline)
+        self.store = ArticleStore(storage_path, retention=retention, legacy_cache_file=self.cache_file)
+        # Only one process per database crawls; the others read what it publishes
+        self.leader = RefreshLeader(f"{storage_path}-refresh.lock")
+        self.cold_start_timeout = 30  # Seconds a reader waits for the leader's first articles
+        self.request_check_interval = 5  # Seconds between checks for refreshes requested by other processes
+        self._request_checked = 0.0  # When request_refresh() calls were last looked for
+        self._request_handled = 0.0  # Time of the last refresh request acted on
+        self.last_refresh_stats = {}
+        self.search_index = SearchIndex(self.store.db)
+        self.duplicates = None  # NearDuplicateIndex over the corpus, built on the first refresh
+        self.extraction_cache = ExtractionCache(self.store.db, ttl=extraction_ttl, max_entries=extraction_cache_size)
+        self.http_client = http_client or HttpClient(pool_maxsize=max_workers)
+        self.extractor = ArticleExtractor(workers=extraction_workers, nlp_mode=nlp_mode)
+        self.enrich_timeout = 10  # Seconds an article view waits for lazy NLP
+        self._views = Counter()  # article ID -> enrich_article calls, for articles still without NLP
+        self._enrichments = {}  # article ID -> in-flight lazy NLP future
+        self._enrich_lock = threading.Lock()
+        self.publish_interval = 2.0  # Minimum seconds between progressive publishes during a refresh
+        self._refresh_lock = threading.Lock()
+        self._refresh_done = None  # Event set when the in-flight refresh finishes
+        self._refresh_published = None  # Event set once the in-flight refresh has published anything
     
-    def _initialize_sources(self) -> List[NewsSource]:
+    @staticmethod
+    def _initialize_sources() -> List[NewsSource]:
         """Initialize list of news sources with quality sources for different categories."""
         sources = [
             # High-quality general news sources with fewer ads
@@ -254,154 +470,423 @@ class NewsFeed:
         ]
         return sources
     
-    def get_articles(self, category: str = None) -> List[Dict[str, Any]]:
-        """Get articles from all sources or from cache if available.
+    def get_articles(self, category: str = None, limit: Optional[int] = None,
+                     since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Get articles from the cache, newest first, refreshing it if needed.
+        
+        An expired cache is still served (see is_stale) while a background
+        refresh runs; only a missing cache makes the caller wait for a crawl.
         
         Args:
             category: Optional category to filter by
+            limit: Optional maximum number of articles to return
+            since: Optional epoch seconds; only articles published at or after it are returned
         """
-        # Check if cache is valid
-        if os.path.exists(self.cache_file):
-            try:
-                with open(self.cache_file, 'r') as f:
-                    cache = json.load(f)
-                    if time.time() - cache.get('timestamp', 0) < self.cache_duration:
-                        articles = cache.get('articles', [])
-                        # Filter by category if specified
-                        if category:
-                            # Enhanced category filtering with keywords
-                            category_lower = category.lower()
-                            category_keywords = CATEGORY_KEYWORDS.get(category_lower, [])
-                            filtered_articles = []
-                            
-                            for article in articles:
-                                # Direct category match
-                                if category_lower == article.get('category', '').lower():
-                                    filtered_articles.append(article)
-                                    continue
-                                    
-                                # Title and text matching
-                                title = article.get('title', '').lower()
-                                text = article.get('text', '').lower()
-                                summary = article.get('summary', '').lower()
-                                
-                                # Check if any category keyword is in title or text
-                                if any(keyword in title or keyword in text or keyword in summary for keyword in category_keywords):
-                                    # Clone article and set its category
-                                    article_copy = article.copy()
-                                    article_copy['category'] = category_lower
-                                    filtered_articles.append(article_copy)
-                                    
-                            return filtered_articles
-                        return articles
-            except (json.JSONDecodeError, IOError) as e:
-                logger.error(f"Error reading cache file: {e}")
-        
-        # Fetch new articles
-        all_articles = []
-        for source in self.sources:
-            try:
-                # If category is specified, focus on relevant sources first
-                if category and category.lower() != source.category.lower() and source.category != 'general':
+        snapshot = self._current_snapshot()
+        if not snapshot:
+            return []
+        category = category.lower() if category else None
+        if since is not None:
+            articles = snapshot.since(since, category)[:limit]
+        elif limit is not None:
+            articles = snapshot.newest(limit, category)
+        elif category:
+            articles = snapshot.in_category(category)
+        else:
+            return snapshot.articles
+        return self._label_category(articles, category) if category else articles
+    
+    def get_article_page(self, category: str = None, cursor: Optional[str] = None,
+                         limit: int = 20) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of articles, newest first.
+        
+        Args:
+            category: Optional category to filter by
+            cursor: Opaque cursor returned with the previous page; None for the first page
+            limit: Maximum number of articles on the page
+        
+        Returns:
+            The articles and the cursor for the next page (None on the last page).
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        after = decode_cursor(cursor) if cursor else None
+        snapshot = self._current_snapshot()
+        if not snapshot:
+            return [], None
+        category = category.lower() if category else None
+        # Fetch one extra article to find out whether there is a next page
+        articles = snapshot.page(limit + 1, after, category)
+        next_cursor = encode_cursor(articles[limit - 1]) if len(articles) > limit else None
+        articles = articles[:limit]
+        return (self._label_category(articles, category) if category else articles), next_cursor
+    
+    def _current_snapshot(self):
+        """Return the snapshot to serve, starting or waiting for a refresh as needed."""
+        snapshot = self.store.get_snapshot()
+        if snapshot is None:
+            SNAPSHOT_READS.inc(state='cold')
+            # Nothing to serve yet: wait for the first sources of a crawl, shared
+            # with any concurrent callers, rather than for the whole crawl
+            self.refresh_due(wait=False)
+            with self._refresh_lock:
+                published = self._refresh_published
+            if published is not None:
+                published.wait()
+            elif not self.leader.is_leader():
+                # Another process crawls: wait for its first articles to reach the database
+                deadline = time.monotonic() + self.cold_start_timeout
+                while self.store.get_snapshot() is None and time.monotonic() < deadline:
+                    time.sleep(0.2)
+            snapshot = self.store.get_snapshot()
+        else:
+            SNAPSHOT_READS.inc(state='stale' if time.time() - snapshot.timestamp >= self.cache_duration else 'fresh')
+            self.refresh_due(wait=False)
+        return snapshot
+    
+    def corpus_version(self) -> Optional[Tuple[int, float]]:
+        """(published generation, timestamp) of the snapshot being served, or None if there are no articles yet.
+        
+        Changes whenever a refresh publishes, so it can back HTTP validators
+        of listings. Updates of single articles, such as enrichment, do not
+        change it (see article_version()).
+        """
+        snapshot = self._current_snapshot()
+        if not snapshot:
+            return None
+        return snapshot.published_generation, snapshot.timestamp
+    
+    def article_version(self, article_id: str) -> Optional[int]:
+        """Generation the served version of an article was written in.
+        
+        Changes only when that article does, so it can back HTTP validators
+        of the article. None if the article is missing or was not persisted.
+        """
+        article = self.get_article_by_id(article_id)
+        return getattr(article, 'version', None) if article else None
+    
+    def cache_age(self) -> float:
+        """Seconds since the current snapshot was written."""
+        snapshot = self.store.get_snapshot()
+        if snapshot is None:
+            return float('inf')
+        return time.time() - snapshot.timestamp
+    
+    def is_stale(self) -> bool:
+        """Whether the current snapshot is older than cache_duration."""
+        return self.cache_age() >= self.cache_duration
+    
+    def is_refreshing(self) -> bool:
+        """Whether a refresh is currently running."""
+        return self._refresh_done is not None
+    
+    def refresh(self, wait: bool = True, sources: Optional[List[NewsSource]] = None) -> bool:
+        """Re-crawl sources and publish their articles.
+        
+        Concurrent calls collapse into a single crawl: callers that arrive
+        while a refresh is running share it instead of starting their own.
+        Only the process leading the database crawls; in other processes a
+        full refresh is passed on to the leader (see refresh_due()).
+        
+        Args:
+            wait: Block until the refresh has finished; otherwise it runs on
+                a background thread
+            sources: Sources to crawl (defaults to all of them)
+        
+        Returns:
+            True if this call started the refresh.
+        """
+        if not self.leader.acquire():
+            if sources is None:
+                self.store.request_refresh()
+            return False
+        
+        with self._refresh_lock:
+            done = self._refresh_done
+            started = done is None
+            if started:
+                done = self._refresh_done = threading.Event()
+                published = self._refresh_published = threading.Event()
+        
+        if started:
+            if wait:
+                self._run_refresh(done, published, sources)
+            else:
+                threading.Thread(target=self._run_refresh, args=(done, published, sources),
+                                 name='news-refresh', daemon=True).start()
+        elif wait:
+            done.wait()
+        return started
+    
+    def refresh_due(self, wait: bool = True) -> bool:
+        """Crawl the sources the scheduler says are due, if any.
+        
+        Returns:
+            True if this call started a refresh.
+        """
+        requested = self._refresh_requested()
+        due = self.sources if requested else self.scheduler.due(self.sources)
+        if not due or not self.leader.acquire():
+            return False
+        if requested:
+            logger.info("Refreshing all sources as requested by another process")
+            return self.refresh(wait)
+        logger.info(f"Polling {len(due)} of {len(self.sources)} sources that are due")
+        return self.refresh(wait, due)
+    
+    def _refresh_requested(self) -> bool:
+        """Whether another process asked for a full refresh since the last one was handled.
+        
+        The database is only checked every few seconds, as this runs on every request.
+        """
+        now = time.monotonic()
+        if now - self._request_checked < self.request_check_interval:
+            return False
+        self._request_checked = now
+        requested = self.store.refresh_requested_at()
+        if requested <= self._request_handled:
+            return False
+        self._request_handled = requested
+        return True
+    
+    def next_refresh_in(self) -> float:
+        """Seconds until the next source is due to be polled."""
+        return max(self.scheduler.next_due(self.sources) - time.time(), 0)
+    
+    def _run_refresh(self, done: threading.Event, published: threading.Event,
+                     sources: Optional[List[NewsSource]] = None):
+        try:
+            with REFRESH_SECONDS.time():
+                self._refresh_articles(published, sources)
+        except Exception as e:
+            logger.error(f"Error refreshing articles: {e}")
+        finally:
+            with self._refresh_lock:
+                self._refresh_done = None
+                self._refresh_published = None
+            published.set()
+            done.set()
+    
+    def _refresh_articles(self, published: Optional[threading.Event] = None,
+                          sources: Optional[List[NewsSource]] = None):
+        """Re-crawl sources and publish the results as they come in.
+        
+        The refresh is a pipeline of generator stages, so each source's
+        articles flow through as soon as that source is done:
+        
+            fetch      sources are downloaded, extracted and classified
+                       concurrently (see _fetch_sources)
+            dedup      near-duplicates of articles already in the corpus are
+                       dropped and the rest made JSON-safe
+            publish    new and updated articles are upserted into the store
+                       at most every publish_interval seconds
+        
+        The fetcher only starts another source when the pipeline asks for it,
+        so at most max_workers sources' articles are in flight between stages.
+        
+        Args:
+            published: Set once the first articles have been published
+            sources: Sources to crawl (defaults to all of them)
+        """
+        # Sources whose circuit breaker is open are skipped until their backoff is over
+        sources = [source for source in (sources or self.sources) if self.health.allow(source)]
+        reused = set()  # IDs of articles reused from feeds that answered 304
+        batches = self._dedupe_stream(self._fetch_sources(sources, reused))
+        refreshed = 0  # articles published by this refresh
+        deferred = []  # IDs of published articles still without keywords, in deferred NLP mode
+        pending = []  # articles waiting for the next publish
+        last_publish = None
+        for batch in batches:
+            pending.extend(batch)
+            if pending and (last_publish is None or time.monotonic() - last_publish >= self.publish_interval):
+                refreshed += self._publish_pending(pending, deferred, reused)
+                pending = []
+                last_publish = time.monotonic()
+                if published is not None:
+                    published.set()
+        if pending:
+            refreshed += self._publish_pending(pending, deferred, reused)
+        self.extraction_cache.prune()
+        
+        if not refreshed:
+            # Keep serving the existing articles, which expire only once they are past retention
+            logger.warning("Refresh returned no articles, keeping the existing ones")
+            return
+        
+        if deferred:
+            threading.Thread(target=self._run_deferred_nlp, args=(deferred,),
+                             name='news-deferred-nlp', daemon=True).start()
+    
+    def _publish_pending(self, articles: List[Dict[str, Any]], deferred: List[str], reused: Set[str]) -> int:
+        """Publish a batch, noting the IDs of articles that deferred NLP still has to enrich.
+        
+        Only new or re-extracted articles are enriched; those in `reused` were
+        queued when their feed last changed.
+        """
+        self._publish(articles)
+        if self.extractor.nlp_mode == 'deferred':
+            deferred.extend(article['id'] for article in articles
+                            if 'keywords' not in article and article.get('text') and article['id'] not in reused)
+        return len(articles)
+    
+    def _dedupe_stream(self, batches: Iterator[List[Dict[str, Any]]]) -> Iterator[List[Dict[str, Any]]]:
+        """Dedup stage: drop articles that duplicate a different article in the corpus.
+        
+        Duplicates are the same canonical URL or a near-identical title; the
+        first version to arrive is kept. Articles seen again keep flowing
+        through, so that they count as seen and are updated.
+        """
+        if self.duplicates is None:
+            self.duplicates = NearDuplicateIndex()
+            snapshot = self.store.get_snapshot()
+            for article in (snapshot.articles if snapshot else []):
+                self.duplicates.add(article['id'], article.get('title', ''), article.get('url', ''))
+        seen = set()  # IDs already passed on in this refresh
+        for batch in batches:
+            started = time.perf_counter()
+            unique_articles = []
+            for article in batch:
+                if article['id'] in seen:
                     continue
-                    
-                articles = source.fetch_articles()
-                all_articles.extend(articles)
-                logger.info(f"Fetched {len(articles)} articles from {source.name}")
-            except Exception as e:
-                logger.error(f"Error fetching from source {source.name}: {e}")
+                duplicate_of = self.duplicates.add(article['id'], article.get('title', ''), article.get('url', ''))
+                if duplicate_of is None or duplicate_of == article['id']:
+                    seen.add(article['id'])
+                    unique_articles.append(article)
+            deduped = time.perf_counter()
+            unique_articles = [self._make_json_serializable_dict(article) for article in unique_articles]
+            STAGE_SECONDS.observe(deduped - started, stage='dedup')
+            STAGE_SECONDS.observe(time.perf_counter() - deduped, stage='serialize')
+            yield unique_articles
+    
+    def _publish(self, articles: List[Dict[str, Any]]) -> ArticleSnapshot:
+        """Publish stage: upsert articles into the store (and search index) and swap in the new snapshot."""
+        with STAGE_SECONDS.time(stage='publish'):
+            snapshot = self.store.publish(sorted(articles, key=time_order_key))
+            # Forget articles that expired from the corpus
+            if self.duplicates is not None:
+                for article_id in self.duplicates.keys() - snapshot.by_id.keys():
+                    self.duplicates.remove(article_id)
+        return snapshot
+    
+    def _run_deferred_nlp(self, article_ids: List[str], batch_size: int = 50):
+        """Add keywords and summaries to articles that were published without them.
         
-        # If not enough category-specific articles found and category is specified, get from general sources too
-        if category and len(all_articles) < 10:
-            logger.info(f"Not enough {category} articles, fetching from general sources")
-            for source in self.sources:
+        Articles are read back from the store and enriched batch by batch, so
+        only batch_size bodies are in memory at a time.
+        """
+        total = 0
+        for start in range(0, len(article_ids), batch_size):
+            snapshot = self.store.get_snapshot()
+            todo = [snapshot.get(article_id) for article_id in article_ids[start:start + batch_size]]
+            todo = [article for article in todo if article is not None and 'keywords' not in article]
+            futures = [(article, self.extractor.submit_nlp(article['url'], article['title'], article['text']))
+                       for article in todo]
+            enriched = []
+            for article, future in futures:
                 try:
-                    if source.category == 'general':
-                        articles = source.fetch_articles()
-                        all_articles.extend(articles)
-                        logger.info(f"Fetched {len(articles)} general articles from {source.name}")
+                    nlp = future.result()
                 except Exception as e:
-                    logger.error(f"Error fetching from source {source.name}: {e}")
-        
-        # Sort by published date (newest first)
-        all_articles.sort(key=lambda x: x.get('published', ''), reverse=True)
-        
-        # Remove duplicates (articles with similar titles)
-        unique_articles = []
-        titles_list = []  # Use a list instead of a set for better control
-        for article in all_articles:
-            title = article.get('title', '').lower()
-            # Skip if we've seen a very similar title
-            if any(self._similar_titles(title, existing) for existing in titles_list):
+                    logger.warning(f"Error running NLP for {article['url']}: {e}")
+                    continue
+                if article['url']:
+                    self.extraction_cache.update(article['url'], nlp)
+                enriched.append(dict(article, keywords=nlp['keywords'], summary=nlp['summary'] or article['summary']))
+            if enriched:
+                self.store.update(enriched)
+                total += len(enriched)
+        
+        if total:
+            logger.info(f"Added keywords and summaries to {total} articles")
+    
+    def _label_category(self, articles: List[Dict[str, Any]], category: str) -> List[Dict[str, Any]]:
+        """Show articles of a category under that category, whether matched by source or by keywords."""
+        filtered_articles = []
+        for article in articles:
+            if article.get('category', '').lower() != category:
+                # Matched by keywords: copy the article record (not its body) with this category
+                article = article.replace(category=category)
+            filtered_articles.append(article)
+        return filtered_articles
+    
+    def _fetch_sources(self, sources: List[NewsSource],
+                       reused: Optional[Set[str]] = None) -> Iterator[List[Dict[str, Any]]]:
+        """Fetch stage: fetch the given sources concurrently, yielding each source's articles as it finishes.
+        
+        Args:
+            sources: Sources to fetch
+            reused: Receives the IDs of articles reused from feeds that answered 304
+        """
+        started = time.time()
+        total = unchanged = failed = skipped = 0
+        for result in self.fetcher.fetch(sources, self._fetch_source):
+            if result.skipped:
+                # Never tried, so it says nothing about the source's health; it stays due for the next refresh
+                skipped += 1
+                SOURCE_FETCHES.inc(source=result.source.name, status='skipped')
+                self.health.release(result.source)
+                continue
+            status = 'error' if result.error else result.source.last_fetch_status
+            SOURCE_FETCH_SECONDS.observe(result.elapsed, source=result.source.name)
+            SOURCE_FETCHES.inc(source=result.source.name, status=status)
+            SOURCE_ARTICLES.inc(len(result.articles), source=result.source.name)
+            if status == 'error':
+                if result.error:
+                    logger.error(f"Error fetching from source {result.source.name}: {result.error}")
+                failed += 1
+                self.health.record_failure(result.source, result.elapsed, result.error or result.source.last_error)
+                self.scheduler.postpone(result.source, until=self.health.retry_at(result.source))
                 continue
-            titles_list.append(title)
-            unique_articles.append(article)
-        
-        # Ensure all data is JSON serializable before caching
-        json_safe_articles = []
-        for article in unique_articles:
-            json_safe_article = {}
-            for key, value in article.items():
-                # Convert sets to lists and handle other non-serializable types
-                if isinstance(value, set):
-                    json_safe_article[key] = list(value)
-                elif isinstance(value, (str, int, float, bool, type(None))):
-                    json_safe_article[key] = value
-                elif isinstance(value, list):
-                    # Recursively make lists serializable
-                    json_safe_article[key] = self._make_json_serializable(value)
-                elif isinstance(value, dict):
-                    # Recursively make dicts serializable
-                    json_safe_article[key] = self._make_json_serializable_dict(value)
-                else:
-                    # Convert other types to string
-                    json_safe_article[key] = str(value)
-            json_safe_articles.append(json_safe_article)
-        
-        # Cache all articles (not just the filtered ones)
-        cache_data = {
-            'timestamp': time.time(),
-            'articles': json_safe_articles
+            self.health.record_success(result.source, result.elapsed)
+            self.scheduler.record(result.source, result.source.last_new_entries,
+                                  result.source.last_entry_count, result.source.feed_hints)
+            articles = result.articles
+            if result.source.last_fetch_status == 'unchanged':
+                unchanged += 1
+                articles = self._with_stored_nlp(articles)
+                if reused is not None:
+                    reused.update(article['id'] for article in articles)
+                logger.info(f"{result.source.name} unchanged since last fetch, reusing {len(articles)} articles")
+            else:
+                logger.info(f"Fetched {len(articles)} articles from {result.source.name} in {result.elapsed:.1f}s")
+            total += len(articles)
+            yield articles
+        
+        self.last_refresh_stats = {
+            'finished_at': time.time(),
+            'duration': time.time() - started,
+            'sources': len(sources),
+            'unchanged': unchanged,
+            'failed': failed,
+            'skipped': skipped,
+            'articles': total
         }
-        try:
-            with open(self.cache_file, 'w') as f:
-                json.dump(cache_data, f)
-        except Exception as e:
-            logger.error(f"Error writing cache file: {e}")
-            # If caching fails, delete the cache file to prevent using corrupted data
-            try:
-                if os.path.exists(self.cache_file):
-                    os.remove(self.cache_file)
-            except:
-                pass
-        
-        # Filter by category if specified
-        if category:
-            category_lower = category.lower()
-            category_keywords = CATEGORY_KEYWORDS.get(category_lower, [])
-            filtered_articles = []
-            
-            for article in unique_articles:
-                # Direct category match
-                if category_lower == article.get('category', '').lower():
-                    filtered_articles.append(article)
-                    continue
-                
-                # Title and text matching
-                title = article.get('title', '').lower()
-                text = article.get('text', '').lower()
-                summary = article.get('summary', '').lower()
-                
-                # Check if any category keyword is in title or text
-                if any(keyword in title or keyword in text or keyword in summary for keyword in category_keywords):
-                    # Clone article and set its category
-                    article_copy = article.copy()
-                    article_copy['category'] = category_lower
-                    filtered_articles.append(article_copy)
-            
-            return filtered_articles
+        logger.info(f"Fetched {total} articles from {len(sources)} sources in "
+                    f"{self.last_refresh_stats['duration']:.1f}s ({unchanged} feeds unchanged, {failed} failed, "
+                    f"{skipped} skipped at the deadline)")
+    
+    def _with_stored_nlp(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Articles reused from a source's previous fetch, with the keywords and summary NLP stored since.
         
-        return unique_articles
+        A source answering 304 returns the articles as they were parsed, so
+        without this, republishing them would drop the results of lazy or
+        deferred NLP.
+        """
+        snapshot = self.store.get_snapshot()
+        if snapshot is None:
+            return articles
+        merged = []
+        for article in articles:
+            stored = snapshot.get(article['id'])
+            if stored is not None and 'keywords' in stored and 'keywords' not in article:
+                article = dict(article, keywords=list(stored['keywords']), summary=stored.get('summary'))
+            merged.append(article)
+        return merged
+    
+    def _fetch_source(self, source: NewsSource, deadline: float) -> List[Dict[str, Any]]:
+        """Fetch a single source; runs on a fetcher worker thread."""
+        return source.fetch_articles(deadline=deadline, extraction_cache=self.extraction_cache,
+                                     http_client=self.http_client, extractor=self.extractor)
     
     def _make_json_serializable(self, value: Any) -> Any:
         """Recursively convert data structures to JSON serializable types."""
@@ -423,28 +908,194 @@ class NewsFeed:
             result[key] = self._make_json_serializable(value)
         return result
     
-    def _similar_titles(self, title1: str, title2: str, threshold: float = 0.8) -> bool:
-        """Check if two titles are very similar."""
-        # Simple version: check if one is contained in the other
-        if len(title1) > 20 and len(title2) > 20:
-            return title1 in title2 or title2 in title1
-        return False
-    
-    def search_articles(self, query: str) -> List[Dict[str, Any]]:
-        """Search articles by query."""
-        articles = self.get_articles()
-        return [
-            article for article in articles
-            if query.lower() in article.get('title', '').lower() or
-               query.lower() in article.get('text', '').lower()
-        ]
+    def search_articles(self, query: str, category: str = None, source: str = None,
+                        limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+        """Search articles by query, best matches first.
+        
+        Supports phrases ("...") and prefixes (word*); see SearchIndex.
+        
+        Args:
+            query: Search query
+            category: Optional category to restrict results to
+            source: Optional source name to restrict results to
+            limit: Optional maximum number of results
+            offset: Results to skip, for paging
+        """
+        snapshot = self._current_snapshot()
+        if not snapshot:
+            return []
+        return [snapshot.by_id[doc_id] for doc_id, _ in self.search_index.search(query, category, source, limit, offset)
+                if doc_id in snapshot.by_id]
+    
+    def count_search_results(self, query: str, category: str = None, source: str = None) -> int:
+        """Number of articles matching a search query; see search_articles()."""
+        return self.search_index.count(query, category, source)
+    
+    def enrich_article(self, article_id: str) -> Optional[Dict[str, Any]]:
+        """Get an article with its keywords and NLP summary.
+        
+        In 'lazy' NLP mode these are computed the first time an article is
+        requested and memoized into the store and extraction cache; concurrent
+        requests for the same article share one computation. Views are counted
+        so that prewarm_enrichment can enrich popular articles ahead of time.
+        
+        The returned article is shared with other readers and must not be modified.
+        """
+        article = self.get_article_by_id(article_id)
+        if article is None:
+            return None
+        if self._needs_enrichment(article):
+            with self._enrich_lock:
+                self._views[article_id] += 1
+        return self._enrich(article)
     
-    def get_article_by_id(self, article_id: int) -> Dict[str, Any]:
-        """Get a specific article by its index in the list."""
-        articles = self.get_articles()
-        if 0 <= article_id < len(articles):
-            return articles[article_id]
-        return None
+    def prewarm_enrichment(self, limit: int = 20) -> int:
+        """Run lazy NLP for the most viewed articles that do not have it yet.
+        
+        Returns:
+            The number of articles enriched.
+        """
+        snapshot = self.store.get_snapshot()
+        if self.extractor.nlp_mode != 'lazy' or snapshot is None:
+            return 0
+        with self._enrich_lock:
+            # Forget articles that expired from the corpus or were enriched since, so
+            # the counter only holds candidates
+            for article_id in [article_id for article_id in self._views
+                               if not self._needs_enrichment(snapshot.get(article_id))]:
+                del self._views[article_id]
+            ranked = [article_id for article_id, _ in self._views.most_common(limit)]
+        enriched = sum('keywords' in self._enrich(snapshot.get(article_id)) for article_id in ranked)
+        if enriched:
+            logger.info(f"Pre-warmed keywords and summaries for {enriched} popular articles")
+        return enriched
+    
+    def _needs_enrichment(self, article: Optional[Dict[str, Any]]) -> bool:
+        return (self.extractor.nlp_mode == 'lazy' and article is not None
+                and 'keywords' not in article and bool(article.get('text')))
+    
+    def _enrich(self, article: Dict[str, Any]) -> Dict[str, Any]:
+        if not self._needs_enrichment(article):
+            return article
+        
+        article_id = article['id']
+        deadline = time.monotonic() + self.enrich_timeout
+        with self._enrich_lock:
+            # Another request may have finished enriching it in the meantime
+            snapshot = self.store.get_snapshot()
+            current = snapshot.get(article_id) if snapshot is not None else None
+            if current is not None and 'keywords' in current:
+                return current
+            future = self._enrichments.get(article_id)
+            owner = future is None
+            if owner:
+                # Concurrent requests wait on this future; the NLP job is submitted outside the lock
+                future = self._enrichments[article_id] = Future()
+        if owner:
+            try:
+                # Fall back to the article as it is if the NLP queue stays full
+                self._chain(self.extractor.submit_nlp(article['url'], article['title'], article['text'],
+                                                      timeout=self.enrich_timeout), future)
+            except Exception as e:
+                future.set_exception(e)
+        try:
+            nlp = future.result(timeout=max(deadline - time.monotonic(), 0))
+        except Exception as e:
+            logger.warning(f"Error running NLP for {article['url']}: {e or 'timed out'}")
+            if owner:
+                with self._enrich_lock:
+                    self._enrichments.pop(article_id, None)
+            return article
+        
+        enriched = dict(article, keywords=nlp['keywords'], summary=nlp['summary'] or article['summary'])
+        if owner:
+            self.store.update([enriched])
+            with self._enrich_lock:
+                self._enrichments.pop(article_id, None)
+            if article['url']:
+                # Later refreshes pick the keywords up from the extraction cache
+                self.extraction_cache.update(article['url'], nlp)
+        return enriched
+    
+    @staticmethod
+    def _chain(source: Future, target: Future):
+        """Resolve target with the outcome of source once it is done."""
+        def done(finished: Future):
+            try:
+                target.set_result(finished.result())
+            except BaseException as e:
+                target.set_exception(e)
+        source.add_done_callback(done)
+    
+    def get_article_by_id(self, article_id: str) -> Dict[str, Any]:
+        """Get a specific article by its stable ID.
+        
+        The returned article is shared with other readers and must not be
+        modified. Its body fields are read from the database when accessed.
+        """
+        snapshot = self._current_snapshot()
+        return snapshot.get(article_id) if snapshot else None
+    
+    def source_status(self) -> List[Dict[str, Any]]:
+        """Health and polling schedule of every source, for monitoring."""
+        statuses = []
+        for source in self.sources:
+            status = {
+                'name': source.name,
+                'url': source.url,
+                'category': source.category,
+                'last_fetch': source.last_fetch_status
+            }
+            status.update(self.health.status(source))
+            status.update(self.scheduler.status(source))
+            statuses.append(status)
+        return statuses
+
+class BackgroundRefresher:
+    """Polls a NewsFeed's sources as they fall due, from a daemon thread."""
+    
+    def __init__(self, news_feed: NewsFeed, idle_interval: float = 60):
+        """
+        Args:
+            news_feed: Feed to keep fresh; its scheduler decides when each source is polled
+            idle_interval: Seconds between idle-time tasks such as pre-warming
+        """
+        self.news_feed = news_feed
+        self.idle_interval = idle_interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+    
+    def start(self):
+        """Start the refresh thread if it is not already running."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='news-background-refresh', daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        """Ask the refresh thread to exit after its current refresh."""
+        self._stop.set()
+    
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def _run(self):
+        while not self._stop.is_set():
+            if self.news_feed.refresh_due(wait=True):
+                continue
+            if not self.news_feed.is_refreshing():
+                # Use idle time to run lazy NLP for popular articles
+                try:
+                    self.news_feed.prewarm_enrichment()
+                except Exception as e:
+                    logger.error(f"Error pre-warming articles: {e}")
+            # Sleep until the next source is due, waking up periodically while idle
+            # and to pick up refreshes requested by other processes
+            self._stop.wait(min(max(self.news_feed.next_refresh_in(), 1), self.idle_interval,
+                                self.news_feed.request_check_interval))
 
 # For testing
 if __name__ == "__main__":
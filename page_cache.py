@@ -0,0 +1,51 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class PageCache:
+    """Rendered pages for the corpus version currently being served.
+
+    Pages are keyed by whatever else they depend on (route, category, cursor,
+    ...). The whole cache is dropped as soon as a page for a different corpus
+    version is stored or requested, so a refresh never serves old renders.
+    Beyond `max_entries` the least recently used pages are evicted.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        """
+        Args:
+            max_entries: Maximum number of pages kept; 0 disables the cache
+        """
+        self.max_entries = max_entries
+        self._version = None
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _check_version(self, version: Any):
+        if version != self._version:
+            self._pages.clear()
+            self._version = version
+
+    def get(self, version: Any, key: Hashable) -> Optional[str]:
+        """Return a page rendered from this corpus version, or None."""
+        with self._lock:
+            self._check_version(version)
+            page = self._pages.get(key)
+            if page is not None:
+                self._pages.move_to_end(key)
+            return page
+
+    def put(self, version: Any, key: Hashable, page: str):
+        """Store a page rendered from a corpus version."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._check_version(version)
+            self._pages[key] = page
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_entries:
+                self._pages.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._pages)
@@ -0,0 +1,40 @@
+import html
+import logging
+from typing import Any, Dict, List
+
+from lxml import etree
+from lxml import html as lxml_html
+
+logger = logging.getLogger(__name__)
+
+# Elements removed from article HTML before it is shown
+UNSAFE_TAGS = ('script', 'style', 'iframe', 'form')
+
+
+def sanitize_html(content: str) -> str:
+    """Remove script, style, iframe and form elements from an HTML fragment."""
+    if not content or not content.strip():
+        return ''
+    try:
+        root = lxml_html.fragment_fromstring(content, create_parent='div')
+    except (etree.ParserError, ValueError) as e:
+        logger.warning(f"Error parsing article HTML: {e}")
+        return ''
+    for element in list(root.iter(*UNSAFE_TAGS)):
+        # drop_tree keeps the text that follows the element
+        element.drop_tree()
+    return html.escape(root.text or '', quote=False) + ''.join(
+        lxml_html.tostring(child, encoding='unicode') for child in root)
+
+
+def split_paragraphs(text: str) -> List[str]:
+    """Non-empty paragraphs of extracted article text."""
+    return [p.strip() for p in (text or '').split('\n') if p.strip()]
+
+
+def prepare_content(full_content: str, text: str) -> Dict[str, Any]:
+    """Display-ready fields computed once at ingest so article views do no HTML parsing."""
+    return {
+        'content_html': sanitize_html(full_content),
+        'paragraphs': split_paragraphs(text)
+    }
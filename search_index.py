@@ -0,0 +1,89 @@
+import logging
+import re
+import sqlite3
+from typing import List, Optional, Tuple
+
+from storage import ArticleDatabase
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+# Field name -> score weight; a title hit counts for more than a body hit
+FIELD_WEIGHTS = {'title': 2.0, 'body': 1.0}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens of a piece of text."""
+    return TOKEN_RE.findall(text.lower())
+
+
+def to_fts_query(query: str) -> Optional[str]:
+    """Translate a search query (see SearchIndex) into FTS5 syntax, or None if it has no terms.
+
+    Every token is quoted, so user input can never be read as FTS5 operators.
+    """
+    clauses = []
+    for phrase, word in QUERY_RE.findall(query):
+        terms = tokenize(phrase or word)
+        if not terms:
+            continue
+        if not phrase and word.endswith('*'):
+            clauses.append(f'"{terms[0]}"*')
+        else:
+            # A word like "covid-19" splits into several tokens; match them as a phrase
+            clauses.append('"' + ' '.join(terms) + '"')
+    return ' AND '.join(clauses) or None
+
+
+class SearchIndex:
+    """Full-text search over the article database with BM25 ranking.
+
+    Titles and bodies (summary and text) are indexed by an SQLite FTS5 table
+    that ArticleDatabase updates in the same transaction as every write. The
+    index lives on disk and is shared by all processes. It never has to be
+    built on a request and always matches the stored articles. Query syntax:
+
+        climate policy        both terms (any order)
+        "climate policy"      exact phrase
+        clim*                 any term starting with "clim"
+
+    All parts of a query must match. Results can be restricted by category
+    and source.
+    """
+
+    def __init__(self, db: ArticleDatabase):
+        self.db = db
+
+    def search(self, query: str, category: Optional[str] = None, source: Optional[str] = None,
+               limit: Optional[int] = None, offset: int = 0) -> List[Tuple[str, float]]:
+        """Return (article ID, score) pairs matching the query, best first.
+
+        Args:
+            query: Search query
+            category: Only articles in this category
+            source: Only articles from this source
+            limit: Maximum number of results (all if None)
+            offset: Results to skip, for paging
+        """
+        match = to_fts_query(query)
+        if match is None:
+            return []
+        try:
+            return self.db.search(match, (FIELD_WEIGHTS['title'], FIELD_WEIGHTS['body']), category, source,
+                                  limit, offset)
+        except sqlite3.Error as e:
+            logger.error(f"Error searching for {query!r}: {e}")
+            return []
+
+    def count(self, query: str, category: Optional[str] = None, source: Optional[str] = None) -> int:
+        """Number of articles matching the query."""
+        match = to_fts_query(query)
+        if match is None:
+            return 0
+        try:
+            return self.db.search_count(match, category, source)
+        except sqlite3.Error as e:
+            logger.error(f"Error searching for {query!r}: {e}")
+            return 0
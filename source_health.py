@@ -0,0 +1,144 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'  # healthy: fetched whenever it is due
+OPEN = 'open'  # failing: skipped until retry_at
+HALF_OPEN = 'half_open'  # one probe fetch allowed to find out whether it recovered
+
+
+class _Health:
+    def __init__(self):
+        self.state = CLOSED
+        self.attempts = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.error_rate = 0.0  # smoothed share of failed fetches
+        self.latency = None  # smoothed seconds per fetch
+        self.trips = 0  # times the breaker opened since the source last succeeded
+        self.retry_at = 0.0
+        self.probing = False
+        self.last_error = None
+        self.last_success = None
+        self.last_failure = None
+
+
+class SourceHealth:
+    """Per-source health tracking with a circuit breaker.
+
+    Every fetch updates a source's smoothed latency and error rate. After
+    `failure_threshold` consecutive failures the breaker opens and the source
+    is skipped for a backoff that starts at `base_backoff` seconds and doubles
+    each time it opens again, up to `max_backoff`. Once the backoff is over the
+    breaker is half-open: a single probe fetch is allowed, which closes it on
+    success and reopens it on failure.
+    """
+
+    def __init__(self, failure_threshold: int = 3, base_backoff: float = 900,
+                 max_backoff: float = 24 * 3600, smoothing: float = 0.2):
+        """
+        Args:
+            failure_threshold: Consecutive failures that open the breaker
+            base_backoff: Seconds a source is skipped the first time its breaker opens
+            max_backoff: Longest time a source is skipped
+            smoothing: Weight of the latest fetch in the latency and error rate
+        """
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.smoothing = smoothing
+        self._sources: Dict[str, _Health] = {}
+        self._lock = threading.Lock()
+
+    def _health(self, source: Any) -> _Health:
+        health = self._sources.get(source.name)
+        if health is None:
+            health = self._sources[source.name] = _Health()
+        return health
+
+    def allow(self, source: Any, now: Optional[float] = None) -> bool:
+        """Whether a source may be fetched now; claims the probe of a half-open breaker."""
+        now = time.time() if now is None else now
+        with self._lock:
+            health = self._health(source)
+            if health.state == OPEN and now >= health.retry_at:
+                health.state = HALF_OPEN
+                logger.info(f"Probing {source.name} after {health.consecutive_failures} failed fetches")
+            if health.state == HALF_OPEN:
+                if health.probing:
+                    return False
+                health.probing = True
+                return True
+            return health.state == CLOSED
+
+    def release(self, source: Any):
+        """Give back the probe claimed by allow() when the source was not fetched after all."""
+        with self._lock:
+            self._health(source).probing = False
+
+    def retry_at(self, source: Any) -> float:
+        """Time (epoch seconds) before which an open breaker skips the source; 0 when it is closed."""
+        with self._lock:
+            health = self._health(source)
+            return health.retry_at if health.state != CLOSED else 0.0
+
+    def record_success(self, source: Any, latency: float, now: Optional[float] = None):
+        """Record a fetch that succeeded after `latency` seconds."""
+        now = time.time() if now is None else now
+        with self._lock:
+            health = self._health(source)
+            self._observe(health, latency, failed=False)
+            if health.state != CLOSED:
+                logger.info(f"{source.name} recovered, resuming fetches")
+            health.state = CLOSED
+            health.consecutive_failures = 0
+            health.trips = 0
+            health.retry_at = 0.0
+            health.probing = False
+            health.last_success = now
+
+    def record_failure(self, source: Any, latency: float, error: Optional[str] = None,
+                       now: Optional[float] = None):
+        """Record a failed fetch, opening the breaker if the source keeps failing."""
+        now = time.time() if now is None else now
+        with self._lock:
+            health = self._health(source)
+            self._observe(health, latency, failed=True)
+            health.failures += 1
+            health.consecutive_failures += 1
+            health.last_error = error
+            health.last_failure = now
+            health.probing = False
+            if health.state == HALF_OPEN or health.consecutive_failures >= self.failure_threshold:
+                backoff = min(self.base_backoff * 2 ** health.trips, self.max_backoff)
+                health.trips += 1
+                health.state = OPEN
+                health.retry_at = now + backoff
+                logger.warning(f"{source.name} failed {health.consecutive_failures} times in a row, "
+                               f"skipping it for {backoff:.0f}s")
+
+    def _observe(self, health: _Health, latency: float, failed: bool):
+        health.attempts += 1
+        health.latency = latency if health.latency is None else (
+            self.smoothing * latency + (1 - self.smoothing) * health.latency)
+        health.error_rate = self.smoothing * failed + (1 - self.smoothing) * health.error_rate
+
+    def status(self, source: Any) -> Dict[str, Any]:
+        """JSON-safe health summary of a source."""
+        with self._lock:
+            health = self._health(source)
+            return {
+                'state': health.state,
+                'attempts': health.attempts,
+                'failures': health.failures,
+                'consecutive_failures': health.consecutive_failures,
+                'error_rate': round(health.error_rate, 3),
+                'latency_ms': round(health.latency * 1000) if health.latency is not None else None,
+                'retry_at': health.retry_at if health.state != CLOSED else None,
+                'last_error': health.last_error,
+                'last_success': health.last_success,
+                'last_failure': health.last_failure
+            }
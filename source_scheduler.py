@@ -0,0 +1,163 @@
+import logging
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+_SKIP_HOURS_RE = re.compile(rb'<skipHours>(.*?)</skipHours>', re.IGNORECASE | re.DOTALL)
+_SKIP_DAYS_RE = re.compile(rb'<skipDays>(.*?)</skipDays>', re.IGNORECASE | re.DOTALL)
+_HOUR_RE = re.compile(rb'<hour>\s*(\d{1,2})\s*</hour>', re.IGNORECASE)
+_DAY_RE = re.compile(rb'<day>\s*([A-Za-z]+)\s*</day>', re.IGNORECASE)
+_TTL_RE = re.compile(rb'<ttl>\s*(\d+)\s*</ttl>', re.IGNORECASE)
+
+
+class FeedHints(NamedTuple):
+    """Polling hints published in an RSS channel."""
+    ttl: Optional[float] = None  # seconds the feed may be cached before polling again
+    skip_hours: FrozenSet[int] = frozenset()  # UTC hours in which not to poll
+    skip_days: FrozenSet[str] = frozenset()  # lowercase weekday names on which not to poll
+
+
+def parse_feed_hints(content: bytes) -> FeedHints:
+    """Read the ttl, skipHours and skipDays elements of an RSS feed.
+
+    feedparser flattens skipHours and skipDays to their last value, so they
+    are read from the raw document instead.
+    """
+    ttl = _TTL_RE.search(content)
+    skip_hours = _SKIP_HOURS_RE.search(content)
+    skip_days = _SKIP_DAYS_RE.search(content)
+    return FeedHints(
+        ttl=int(ttl.group(1)) * 60 if ttl else None,
+        skip_hours=frozenset(int(h) % 24 for h in _HOUR_RE.findall(skip_hours.group(1))) if skip_hours else frozenset(),
+        skip_days=frozenset(d.decode('ascii').lower() for d in _DAY_RE.findall(skip_days.group(1))) if skip_days else frozenset()
+    )
+
+
+class _SourceState:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.next_due = 0.0  # never polled: due right away
+        self.last_poll = None
+        self.rate = None  # smoothed new entries per second
+        self.hints = FeedHints()
+
+
+class SourceScheduler:
+    """Decides when each news source is due to be polled again.
+
+    Every poll reports how many entries were new since the previous one. The
+    scheduler keeps a smoothed publishing rate per source and polls it about
+    as often as it takes to collect `target_new_entries` new entries, within
+    [min_interval, max_interval]. Sources that publish nothing back off
+    gradually; sources whose whole feed turned over since the last poll are
+    polled twice as often. A feed's ttl is used as its minimum interval and
+    no poll is scheduled in its skipHours or on its skipDays.
+    """
+
+    def __init__(self, default_interval: float = 3600, min_interval: float = 300,
+                 max_interval: float = 6 * 3600, target_new_entries: float = 2, smoothing: float = 0.5):
+        """
+        Args:
+            default_interval: Poll interval for a source without history
+            min_interval: Shortest poll interval
+            max_interval: Longest poll interval (unless the feed's ttl is longer)
+            target_new_entries: New entries to aim for per poll
+            smoothing: Weight of the latest observation in the publishing rate
+        """
+        self.default_interval = default_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_new_entries = target_new_entries
+        self.smoothing = smoothing
+        self._states: Dict[str, _SourceState] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, source: Any) -> _SourceState:
+        state = self._states.get(source.name)
+        if state is None:
+            state = self._states[source.name] = _SourceState(self.default_interval)
+        return state
+
+    def due(self, sources: List[Any], now: Optional[float] = None) -> List[Any]:
+        """The sources whose next poll time has come."""
+        now = time.time() if now is None else now
+        with self._lock:
+            return [source for source in sources if self._state(source).next_due <= now]
+
+    def next_due(self, sources: List[Any]) -> float:
+        """Earliest time (epoch seconds) at which one of the sources is due."""
+        with self._lock:
+            return min((self._state(source).next_due for source in sources), default=float('inf'))
+
+    def interval(self, source: Any) -> float:
+        """Current poll interval of a source in seconds."""
+        with self._lock:
+            return self._state(source).interval
+
+    def record(self, source: Any, new_entries: int, entry_count: int = 0,
+               hints: Optional[FeedHints] = None, now: Optional[float] = None):
+        """Adjust a source's poll interval after it was polled successfully.
+
+        Args:
+            source: The polled source
+            new_entries: Entries that were not in the feed at the previous poll
+            entry_count: Entries in the feed (0 if it was not modified)
+            hints: The feed's polling hints, if it was downloaded
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self._state(source)
+            if hints is not None:
+                state.hints = hints
+            if state.last_poll is None:
+                # First poll: every entry looks new, so there is nothing to learn yet
+                interval = state.interval
+            elif entry_count and new_entries >= entry_count:
+                # The whole feed turned over, so entries were probably missed
+                interval = state.interval / 2
+            else:
+                observed = new_entries / max(now - state.last_poll, 1.0)
+                state.rate = observed if state.rate is None else (
+                    self.smoothing * observed + (1 - self.smoothing) * state.rate)
+                interval = self.target_new_entries / state.rate if state.rate > 0 else state.interval * 1.5
+            interval = min(max(interval, self.min_interval), self.max_interval)
+            state.interval = max(interval, state.hints.ttl or 0)
+            state.last_poll = now
+            state.next_due = self._next_allowed(now + state.interval, state.hints)
+
+    def postpone(self, source: Any, until: float = 0, now: Optional[float] = None):
+        """Schedule a source's next poll without changing its interval, e.g. after an error.
+
+        Args:
+            source: The source to postpone
+            until: Don't poll before this time (epoch seconds); the poll is at
+                least one interval out either way
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self._state(source)
+            state.next_due = self._next_allowed(max(now + state.interval, until), state.hints)
+
+    def status(self, source: Any) -> Dict[str, Any]:
+        """JSON-safe scheduling summary of a source."""
+        with self._lock:
+            state = self._state(source)
+            return {
+                'poll_interval': round(state.interval),
+                'next_poll': state.next_due or None,
+                'last_poll': state.last_poll
+            }
+
+    def _next_allowed(self, when: float, hints: FeedHints) -> float:
+        """The first moment at or after `when` outside the feed's skipHours and skipDays."""
+        for _ in range(24 * 7):
+            moment = datetime.fromtimestamp(when, timezone.utc)
+            if moment.hour not in hints.skip_hours and moment.strftime('%A').lower() not in hints.skip_days:
+                return when
+            # Move on to the start of the next hour
+            when = when - moment.minute * 60 - moment.second - moment.microsecond / 1e6 + 3600
+        return when
@@ -33,8 +33,6 @@ document.addEventListener('DOMContentLoaded', () => {
     const modal = document.getElementById('article-modal');
     const modalOverlay = document.querySelector('.modal-overlay');
     const modalClose = document.querySelector('.modal-close');
-    const articleElements = document.querySelectorAll('.article-clickable');
-    const readMoreLinks = document.querySelectorAll('.read-more-link');
 
     // Function to open the modal with an article
     async function openArticleModal(articleId) {
@@ -131,23 +129,142 @@ document.addEventListener('DOMContentLoaded', () => {
         document.body.classList.remove('modal-open');
     }
     
-    // Event listener for article clicks
-    articleElements.forEach(article => {
-        article.addEventListener('click', () => {
-            const articleId = article.dataset.articleId;
-            openArticleModal(articleId);
-        });
+    // One delegated listener handles articles and "Read more" links, including
+    // cards appended later by infinite scrolling
+    document.addEventListener('click', e => {
+        const readMoreLink = e.target.closest('.read-more-link');
+        if (readMoreLink) {
+            e.preventDefault();
+            openArticleModal(readMoreLink.dataset.articleId);
+            return;
+        }
+        const article = e.target.closest('.article-clickable');
+        if (article) {
+            openArticleModal(article.dataset.articleId);
+        }
     });
     
-    // Event listener for "Read more" links
-    readMoreLinks.forEach(link => {
-        link.addEventListener('click', (e) => {
+    // Build an article card like the ones rendered by index.html
+    function createArticleCard(article) {
+        const card = document.createElement('article');
+        card.className = 'article-card article-clickable';
+        card.dataset.articleId = article.id;
+        
+        const imageContainer = document.createElement('div');
+        imageContainer.className = 'image-container';
+        if (article.image) {
+            const img = document.createElement('img');
+            img.src = article.image;
+            img.alt = article.title;
+            imageContainer.appendChild(img);
+        } else {
+            imageContainer.classList.add('no-image');
+            const placeholder = document.createElement('div');
+            placeholder.className = 'placeholder-image';
+            placeholder.textContent = article.source;
+            imageContainer.appendChild(placeholder);
+        }
+        card.appendChild(imageContainer);
+        
+        const title = document.createElement('h3');
+        title.textContent = article.title;
+        card.appendChild(title);
+        
+        const meta = document.createElement('p');
+        meta.className = 'meta';
+        const source = document.createElement('span');
+        source.className = 'source';
+        source.textContent = article.source;
+        const published = document.createElement('span');
+        published.className = 'published';
+        published.textContent = article.published;
+        meta.append(source, ' | ', published);
+        card.appendChild(meta);
+        
+        const content = document.createElement('div');
+        content.className = 'article-content';
+        if (article.paragraphs && article.paragraphs.length > 0) {
+            article.paragraphs.slice(0, 2).forEach(text => {
+                const paragraph = document.createElement('p');
+                paragraph.textContent = text;
+                content.appendChild(paragraph);
+            });
+            if (article.paragraphs.length > 2) {
+                const readMore = document.createElement('p');
+                readMore.className = 'read-more';
+                const link = document.createElement('a');
+                link.href = '#';
+                link.className = 'read-more-link';
+                link.dataset.articleId = article.id;
+                link.textContent = 'Continue reading...';
+                readMore.appendChild(link);
+                content.appendChild(readMore);
+            }
+        } else {
+            const summary = document.createElement('p');
+            summary.className = 'summary';
+            const text = article.summary || '';
+            summary.textContent = text.length > 200 ? `${text.slice(0, 200)}...` : text;
+            content.appendChild(summary);
+        }
+        card.appendChild(content);
+        return card;
+    }
+    
+    // Infinite scroll: load the next page when the "More stories" block comes into view
+    const loadMore = document.querySelector('.load-more');
+    const articlesGrid = document.querySelector('.articles-grid');
+    if (loadMore && articlesGrid && 'IntersectionObserver' in window) {
+        let loading = false;
+        
+        async function loadNextPage() {
+            const cursor = loadMore.dataset.nextCursor;
+            if (loading || !cursor) {
+                return;
+            }
+            loading = true;
+            loadMore.classList.add('loading');
+            try {
+                const params = new URLSearchParams({ cursor });
+                if (loadMore.dataset.category) {
+                    params.set('category', loadMore.dataset.category);
+                }
+                const response = await fetch(`/api/articles?${params}`);
+                if (!response.ok) {
+                    throw new Error('Failed to fetch articles');
+                }
+                const page = await response.json();
+                const fragment = document.createDocumentFragment();
+                page.articles.forEach(article => fragment.appendChild(createArticleCard(article)));
+                articlesGrid.appendChild(fragment);
+                
+                if (page.next_cursor) {
+                    loadMore.dataset.nextCursor = page.next_cursor;
+                    loadMore.querySelector('a').href = `/?${new URLSearchParams({ ...Object.fromEntries(params), cursor: page.next_cursor })}`;
+                } else {
+                    observer.disconnect();
+                    loadMore.remove();
+                }
+            } catch (error) {
+                console.error('Error loading articles:', error);
+            } finally {
+                loading = false;
+                loadMore.classList.remove('loading');
+            }
+        }
+        
+        const observer = new IntersectionObserver(entries => {
+            if (entries.some(entry => entry.isIntersecting)) {
+                loadNextPage();
+            }
+        }, { rootMargin: '600px 0px' });
+        observer.observe(loadMore);
+        
+        loadMore.querySelector('a').addEventListener('click', e => {
             e.preventDefault();
-            e.stopPropagation(); // Prevent the click from reaching the parent article
-            const articleId = link.dataset.articleId;
-            openArticleModal(articleId);
+            loadNextPage();
         });
-    });
+    }
     
     // Close modal when clicking the close button
     modalClose.addEventListener('click', closeModal);
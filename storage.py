@@ -0,0 +1,419 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Large per-article fields, stored compressed apart from the card metadata
+BODY_FIELDS = ('full_content', 'text', 'content_html', 'paragraphs')
+# Paragraphs kept with the card metadata as a preview for article cards, under PREVIEW_KEY
+PREVIEW_PARAGRAPHS = 5
+PREVIEW_KEY = 'preview'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS articles (
+    id TEXT PRIMARY KEY,
+    published_ts REAL NOT NULL,
+    seen_at REAL NOT NULL,
+    generation INTEGER NOT NULL,
+    meta TEXT NOT NULL,
+    body BLOB
+);
+CREATE INDEX IF NOT EXISTS articles_by_time ON articles (published_ts DESC, id);
+CREATE INDEX IF NOT EXISTS articles_by_generation ON articles (generation);
+CREATE INDEX IF NOT EXISTS articles_by_seen ON articles (seen_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS extractions (
+    url TEXT PRIMARY KEY,
+    article_id TEXT NOT NULL,
+    extracted_at REAL NOT NULL,
+    used_at REAL NOT NULL,
+    meta TEXT NOT NULL,
+    body BLOB
+);
+CREATE INDEX IF NOT EXISTS extractions_by_article ON extractions (article_id);
+CREATE INDEX IF NOT EXISTS extractions_by_use ON extractions (used_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS article_search USING fts5(
+    title, body, source UNINDEXED, categories UNINDEXED
+);
+'''
+
+
+def _pack(article: Dict[str, Any], preview: bool = False) -> Tuple[str, bytes]:
+    meta = {key: value for key, value in article.items() if key not in BODY_FIELDS}
+    if preview and 'paragraphs' in article:
+        meta[PREVIEW_KEY] = article['paragraphs'][:PREVIEW_PARAGRAPHS]
+    body = {key: article[key] for key in BODY_FIELDS if key in article}
+    # Sorted keys, so that an article packs the same however its dict was built
+    return json.dumps(meta, sort_keys=True), zlib.compress(json.dumps(body, sort_keys=True).encode('utf-8'))
+
+
+def _search_fields(article: Dict[str, Any]) -> Tuple[str, str, str, str]:
+    """Values of the article_search columns: title, body (summary and text), source and categories."""
+    categories = article.get('categories') or [article.get('category', '')]
+    return (article.get('title') or '',
+            ' '.join([article.get('summary') or '', article.get('text') or '']),
+            (article.get('source') or '').lower(),
+            # Padded with spaces so that a category matches as instr(categories, ' name ')
+            ' ' + ' '.join(category.lower() for category in categories) + ' ')
+
+
+def _unpack_body(body: Optional[bytes]) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(body)) if body else {}
+
+
+class WriteResult(NamedTuple):
+    """Outcome of ArticleDatabase.write()."""
+    generation: int  # generation the write was stamped with
+    unchanged: Set[str]  # IDs of written articles that were already stored as they are
+    expired: Set[str]  # IDs of the articles deleted as expired
+
+
+class CorpusChanges(NamedTuple):
+    """Articles written after a generation, as read by ArticleDatabase.load()."""
+    articles: List[Dict[str, Any]]
+    versions: Dict[str, int]  # article ID -> generation its current version was written in, for `articles`
+    ids: Set[str]  # IDs of every stored article
+    generation: int
+    published_generation: int
+    timestamp: float
+
+
+class ArticleDatabase:
+    """SQLite storage for the article corpus.
+
+    Each article is a row of card metadata (JSON) plus a zlib-compressed body
+    holding the large text and HTML fields, so listings can be read without
+    the bodies. Writes are transactions in WAL mode: a crash never leaves a
+    half-written corpus and readers in other processes are not blocked.
+
+    Every write stamps its rows with a new corpus generation, which lets
+    readers pick up just the rows that changed since the generation they
+    last loaded (see load()). Articles written again with the same content
+    only have their seen_at updated and keep their generation. Writes that
+    publish a refresh (those given a timestamp) also advance the published
+    generation, which identifies the corpus as of its last refresh; updates
+    of single articles do not.
+
+    Titles and bodies are indexed for full-text search in an FTS5 table that
+    is updated in the same transaction as the articles (see search()).
+
+    The database also holds the extraction cache (see the *_extraction
+    methods). An extraction's body is dropped from the cache once an article
+    carrying it is written, and read from that article's row instead, so
+    each body is stored once.
+    """
+
+    def __init__(self, path: str = 'articles.db'):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._index_existing()
+
+    def _index_existing(self):
+        """Index articles written before the database had a search table."""
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM meta WHERE key = 'search_indexed'").fetchone():
+                return
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Another process may have done it while this one waited for the lock
+                if not self._conn.execute("SELECT 1 FROM meta WHERE key = 'search_indexed'").fetchone():
+                    self._conn.execute('DELETE FROM article_search')
+                    rows = self._conn.execute('SELECT rowid, meta, body FROM articles')
+                    self._conn.executemany(
+                        'INSERT INTO article_search (rowid, title, body, source, categories) VALUES (?, ?, ?, ?, ?)',
+                        ((rowid,) + _search_fields(dict(json.loads(meta), **_unpack_body(body)))
+                         for rowid, meta, body in rows.fetchall()))
+                    self._conn.execute("INSERT INTO meta (key, value) VALUES ('search_indexed', '1')")
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def data_version(self) -> int:
+        """Changes whenever another connection commits to the database."""
+        with self._lock:
+            return self._conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def state(self) -> Tuple[int, int, float]:
+        """Current (generation, published generation, timestamp) of the corpus; zeros if nothing was written yet."""
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> Tuple[int, int, float]:
+        rows = dict(self._conn.execute(
+            "SELECT key, value FROM meta WHERE key IN ('generation', 'published_generation', 'timestamp')"))
+        generation = int(rows.get('generation', 0))
+        # Databases written before published generations were tracked count every write
+        return generation, int(rows.get('published_generation', generation)), float(rows.get('timestamp', 0))
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """A value shared by all processes using the database, or None."""
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+    def write(self, articles: Iterable[Dict[str, Any]], seen_at: Optional[float] = None,
+              expire_before: Optional[float] = None, timestamp: Optional[float] = None) -> WriteResult:
+        """Insert or replace articles and drop expired ones in one transaction.
+
+        Articles stored with the same content already are not rewritten.
+
+        Args:
+            articles: Articles to upsert
+            seen_at: Record the articles as seen in a feed at this time; if
+                None, rows that already exist keep their previous value
+            expire_before: Delete articles last seen before this time
+            timestamp: New corpus timestamp, for a write that publishes a
+                refresh (defaults to keeping the current one and the
+                published generation)
+
+        Returns:
+            The generation, and the IDs of the unchanged and the expired articles.
+        """
+        articles = {article['id']: article for article in articles}
+        packed = {article_id: _pack(article, preview=True) for article_id, article in articles.items()}
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                generation, published_generation, current_timestamp = self._state()
+                generation += 1
+                if timestamp is not None:
+                    published_generation = generation
+                unchanged = self._unchanged(packed)
+                if seen_at is not None:
+                    self._conn.executemany('UPDATE articles SET seen_at = ? WHERE id = ?',
+                                           [(seen_at, article_id) for article_id in unchanged])
+                rows = [(article_id, articles[article_id].get('published_ts', 0), seen_at) + packed[article_id]
+                        for article_id in articles if article_id not in unchanged]
+                search_rows = [_search_fields(articles[article_id]) + (article_id,) for article_id, *_ in rows]
+                self._conn.executemany(
+                    '''INSERT INTO articles (id, published_ts, seen_at, generation, meta, body)
+                       VALUES (?1, ?2, COALESCE(?3, ?6), ?4, ?5, ?7)
+                       ON CONFLICT (id) DO UPDATE SET
+                           published_ts = excluded.published_ts,
+                           seen_at = COALESCE(?3, articles.seen_at),
+                           generation = excluded.generation,
+                           meta = excluded.meta,
+                           body = excluded.body''',
+                    [(article_id, published_ts, seen, generation, meta, time.time(), body)
+                     for article_id, published_ts, seen, meta, body in rows])
+                # Replace the search entries of the written articles, which share their rowids
+                self._conn.executemany('DELETE FROM article_search WHERE rowid = (SELECT rowid FROM articles WHERE id = ?)',
+                                       [(article_id,) for article_id, *_ in rows])
+                self._conn.executemany(
+                    'INSERT INTO article_search (rowid, title, body, source, categories) '
+                    'SELECT rowid, ?, ?, ?, ? FROM articles WHERE id = ?', search_rows)
+                # The articles now hold the bodies of their cached extractions
+                self._conn.executemany('UPDATE extractions SET body = NULL WHERE article_id = ? AND body IS NOT NULL',
+                                       [(article_id,) for article_id in articles])
+                expired = set()
+                if expire_before is not None:
+                    expired = {row[0] for row in self._conn.execute('SELECT id FROM articles WHERE seen_at < ?',
+                                                                    (expire_before,))}
+                    self._conn.execute('DELETE FROM article_search WHERE rowid IN '
+                                       '(SELECT rowid FROM articles WHERE seen_at < ?)', (expire_before,))
+                    self._conn.execute('DELETE FROM articles WHERE seen_at < ?', (expire_before,))
+                self._conn.executemany('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', [
+                    ('generation', str(generation)),
+                    ('published_generation', str(published_generation)),
+                    ('timestamp', str(timestamp if timestamp is not None else current_timestamp))
+                ])
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return WriteResult(generation, unchanged, expired)
+
+    def _unchanged(self, packed: Dict[str, Tuple[str, bytes]], chunk_size: int = 500) -> Set[str]:
+        """IDs of the articles whose packed (meta, body) is stored already."""
+        unchanged = set()
+        ids = list(packed)
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            rows = self._conn.execute(f"SELECT id, meta, body FROM articles WHERE id IN ({','.join('?' * len(chunk))})",
+                                      chunk)
+            unchanged.update(article_id for article_id, meta, body in rows if packed[article_id] == (meta, body))
+        return unchanged
+
+    def load(self, since_generation: int = 0, with_bodies: bool = True) -> CorpusChanges:
+        """Read the articles written after a generation, newest first.
+
+        Args:
+            since_generation: Only return rows written after this generation (0 for all)
+            with_bodies: Include the BODY_FIELDS; otherwise only card metadata is read
+
+        Returns:
+            The changes, read consistently in one transaction.
+        """
+        columns = 'id, generation, meta, body' if with_bodies else 'id, generation, meta, NULL'
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                generation, published_generation, timestamp = self._state()
+                rows = self._conn.execute(
+                    f'SELECT {columns} FROM articles WHERE generation > ? ORDER BY published_ts DESC, id',
+                    (since_generation,)).fetchall()
+                ids = {row[0] for row in self._conn.execute('SELECT id FROM articles')}
+            finally:
+                self._conn.execute('COMMIT')
+        articles = []
+        versions = {}
+        for article_id, version, meta, body in rows:
+            article = json.loads(meta)
+            article.update(_unpack_body(body))
+            articles.append(article)
+            versions[article_id] = version
+        return CorpusChanges(articles, versions, ids, generation, published_generation, timestamp)
+
+    def load_body(self, article_id: str) -> Optional[Dict[str, Any]]:
+        """The BODY_FIELDS of one article, or None if it is not stored."""
+        with self._lock:
+            row = self._conn.execute('SELECT body FROM articles WHERE id = ?', (article_id,)).fetchone()
+        return _unpack_body(row[0]) if row else None
+
+    def search(self, match: str, weights: Tuple[float, float] = (1.0, 1.0), category: Optional[str] = None,
+               source: Optional[str] = None, limit: Optional[int] = None, offset: int = 0) -> List[Tuple[str, float]]:
+        """(article ID, BM25 score) of the articles matching an FTS5 query, best first.
+
+        Args:
+            match: FTS5 query over the title and body columns
+            weights: BM25 weights of the title and body columns
+            category: Only articles in this category
+            source: Only articles from this source (case-insensitive)
+            limit: Maximum number of results (all if None)
+            offset: Results to skip
+
+        Raises:
+            sqlite3.OperationalError: If the query is not valid FTS5 syntax
+        """
+        where, params = self._search_filter(match, category, source)
+        with self._lock:
+            # Rank and page within the search table, then look up the IDs of just that page
+            return self._conn.execute(
+                'SELECT articles.id, page.score FROM '
+                f'(SELECT rowid, -bm25(article_search, ?, ?) AS score FROM article_search WHERE {where} '
+                ' ORDER BY score DESC, rowid LIMIT ? OFFSET ?) AS page '
+                'JOIN articles ON articles.rowid = page.rowid ORDER BY page.score DESC, page.rowid',
+                [*weights, *params, -1 if limit is None else limit, offset]).fetchall()
+
+    def search_count(self, match: str, category: Optional[str] = None, source: Optional[str] = None) -> int:
+        """Number of articles matching an FTS5 query; see search()."""
+        where, params = self._search_filter(match, category, source)
+        with self._lock:
+            return self._conn.execute(f'SELECT COUNT(*) FROM article_search WHERE {where}', params).fetchone()[0]
+
+    @staticmethod
+    def _search_filter(match: str, category: Optional[str], source: Optional[str]) -> Tuple[str, list]:
+        where = 'article_search MATCH ?'
+        params = [match]
+        if category:
+            where += ' AND instr(article_search.categories, ?) > 0'
+            params.append(f" {category.lower()} ")
+        if source:
+            where += ' AND article_search.source = ?'
+            params.append(source.lower())
+        return where, params
+
+    def get_extraction(self, url: str, extracted_after: float) -> Optional[Dict[str, Any]]:
+        """A cached extraction made after a time, with its body, or None; counts as a use for LRU eviction.
+
+        Args:
+            url: Normalized article URL
+            extracted_after: Epoch seconds; older extractions are treated as missing
+        """
+        with self._lock:
+            row = self._conn.execute(
+                '''SELECT extractions.meta, COALESCE(extractions.body, articles.body)
+                   FROM extractions LEFT JOIN articles ON articles.id = extractions.article_id
+                   WHERE url = ? AND extracted_at >= ?''', (url, extracted_after)).fetchone()
+            if row is None or row[1] is None:
+                return None
+            self._conn.execute('UPDATE extractions SET used_at = ? WHERE url = ?', (time.time(), url))
+        data = json.loads(row[0])
+        data.update(_unpack_body(row[1]))
+        return data
+
+    def put_extraction(self, url: str, article_id: str, data: Dict[str, Any]) -> bool:
+        """Store the extraction of an article page.
+
+        Args:
+            url: Normalized article URL
+            article_id: ID of the article built from the page
+            data: Extracted fields
+
+        Returns:
+            Whether the URL had no extraction stored before.
+        """
+        meta, body = _pack(data)
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                new = self._conn.execute('SELECT 1 FROM extractions WHERE url = ?', (url,)).fetchone() is None
+                self._conn.execute('INSERT OR REPLACE INTO extractions (url, article_id, extracted_at, used_at, meta, '
+                                   'body) VALUES (?, ?, ?, ?, ?, ?)', (url, article_id, now, now, meta, body))
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return new
+
+    def update_extraction(self, url: str, fields: Dict[str, Any]):
+        """Add metadata fields (not BODY_FIELDS) to a cached extraction without changing its age."""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute('SELECT meta FROM extractions WHERE url = ?', (url,)).fetchone()
+                if row is not None:
+                    self._conn.execute('UPDATE extractions SET meta = ? WHERE url = ?',
+                                       (json.dumps(dict(json.loads(row[0]), **fields)), url))
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def prune_extractions(self, extracted_before: float, max_entries: int) -> int:
+        """Drop expired extractions, those whose body left with their article, and the least recently used beyond max_entries.
+
+        Returns:
+            The number of extractions left.
+        """
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._conn.execute('DELETE FROM extractions WHERE extracted_at < ?', (extracted_before,))
+                self._conn.execute('DELETE FROM extractions WHERE body IS NULL AND '
+                                   'NOT EXISTS (SELECT 1 FROM articles WHERE articles.id = extractions.article_id)')
+                self._conn.execute('DELETE FROM extractions WHERE url IN '
+                                   '(SELECT url FROM extractions ORDER BY used_at DESC LIMIT -1 OFFSET ?)',
+                                   (max_entries,))
+                count = self._conn.execute('SELECT COUNT(*) FROM extractions').fetchone()[0]
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return count
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0]